@@ -0,0 +1,70 @@
+"""
+Compares the JSON codecs available to the client on a large collection
+page, decoding the response document and encoding a bulk update body.
+
+    python benchmarks/json_codec.py [--records 5000] [--repeat 20]
+"""
+import os
+import sys
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flair_api.codec import CODECS, available_codecs
+
+
+def collection_page(records):
+    """Builds a JSON-API document shaped like an admin listing of vents."""
+    return {
+        'meta': {'next': '/api/vents?page=2'},
+        'data': [{
+            'id': str(i),
+            'type': 'vents',
+            'attributes': {
+                'name': f'Vent {i}',
+                'percent-open': i % 100,
+                'duct-temperature-c': 20.5 + (i % 10) / 10.0,
+                'inactive': False,
+                'created-at': '2024-01-01T00:00:00.000Z',
+            },
+            'relationships': {
+                'room': {
+                    'data': {'id': str(i // 4), 'type': 'rooms'},
+                    'links': {'self': f'/api/vents/{i}/relationships/room',
+                              'related': f'/api/vents/{i}/room'}
+                }
+            }
+        } for i in range(records)]
+    }
+
+
+def run(records, repeat):
+    page = collection_page(records)
+    payload = CODECS['json']().dumps(page)
+    results = {}
+    for name in available_codecs():
+        codec = CODECS[name]()
+        decode = min(timeit.repeat(lambda: codec.loads(payload), number=1, repeat=repeat))
+        encode = min(timeit.repeat(lambda: codec.dumps(page), number=1, repeat=repeat))
+        results[name] = (decode, encode)
+    return len(payload), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    size, results = run(args.records, args.repeat)
+    baseline_decode, baseline_encode = results['json']
+    print(f"{args.records} records, {size / 1024:.0f} KiB document")
+    print(f"{'codec':<8} {'decode ms':>10} {'speedup':>8} {'encode ms':>10} {'speedup':>8}")
+    for name, (decode, encode) in results.items():
+        print(f"{name:<8} {decode * 1000:>10.2f} {baseline_decode / decode:>7.1f}x "
+              f"{encode * 1000:>10.2f} {baseline_encode / encode:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Compares building a large collection page eagerly with lazy_models, when
+reading one resource and when reading raw records with iter_raw.
+
+    python benchmarks/lazy_models.py [--records 20000] [--repeat 5]
+"""
+import os
+import sys
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flair_api.client import Client
+from memory import collection_page
+
+
+def run(records, repeat):
+    page = collection_page(records)
+    eager = Client(client_id='id', client_secret='secret', api_root='http://localhost/')
+    lazy = Client(client_id='id', client_secret='secret', api_root='http://localhost/',
+                  lazy_models=True)
+    cases = {
+        'eager, first resource': lambda: eager.handle_body(page)[0],
+        'lazy, first resource': lambda: lazy.handle_body(page)[0],
+        'eager, all resources': lambda: list(eager.handle_body(page)),
+        'lazy, all resources': lambda: list(lazy.handle_body(page)),
+        'lazy, iter_raw': lambda: [r['attributes'] for r in lazy.handle_body(page).iter_raw()],
+    }
+    return {name: min(timeit.repeat(case, number=1, repeat=repeat))
+            for name, case in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.records} records")
+    for name, seconds in run(args.records, args.repeat).items():
+        print(f"{name:<24} {seconds * 1000:>9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
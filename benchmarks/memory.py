@@ -0,0 +1,62 @@
+"""
+Measures the memory used per Resource built from a collection page, with
+relationships untouched and after every relationship has been accessed.
+
+    python benchmarks/memory.py [--records 100000]
+"""
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from flair_api.client import Client
+
+
+def collection_page(records):
+    """Builds a JSON-API document of vents with two relationships each."""
+    return {
+        'meta': {},
+        'data': [{
+            'id': str(i),
+            'type': 'vents',
+            'attributes': {'name': f'Vent {i}', 'percent-open': i % 100},
+            'relationships': {
+                rel: {
+                    'data': {'id': str(i // 4), 'type': rel + 's'},
+                    'links': {'self': f'/api/vents/{i}/relationships/{rel}',
+                              'related': f'/api/vents/{i}/{rel}'}
+                } for rel in ('room', 'structure')
+            }
+        } for i in range(records)]
+    }
+
+
+def measure(records, touch):
+    """Returns the bytes allocated per resource while building a collection."""
+    client = Client(client_id='id', client_secret='secret', api_root='http://localhost/')
+    page = collection_page(records)
+    tracemalloc.start()
+    collection = client.handle_body(page)
+    if touch:
+        for resource in collection.resources:
+            for relationship in resource.relationships.values():
+                relationship.related_href
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return allocated / records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{args.records} resources")
+    print(f"relationships untouched: {measure(args.records, False):8.0f} bytes/resource")
+    print(f"relationships accessed:  {measure(args.records, True):8.0f} bytes/resource")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+A local stand-in for the Flair JSON-API, for benchmarking the client over
+real sockets.
+
+It serves the API root links, OAuth 2.0 tokens (client_credentials and
+refresh_token grants), paginated collections with meta.next, single
+resources, PATCH updates and related resources (structures -> rooms ->
+vents), with an optional delay added to every response.
+
+    python benchmarks/server.py --port 8765 --latency 0.02
+"""
+import json
+import time
+import argparse
+import itertools
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+RESOURCE_TYPES = ('structures', 'rooms', 'vents', 'pucks')
+# Related collections: (type, relationship) -> (related type, children per parent)
+RELATIONSHIPS = {('structures', 'rooms'): ('rooms', 4), ('rooms', 'vents'): ('vents', 3)}
+
+
+class StandInApi(object):
+    """Generates resources and issues tokens for the stand-in server."""
+    def __init__(self, records=200, page_size=50, token_lifetime=3600):
+        self.records = records
+        self.page_size = page_size
+        self.token_lifetime = token_lifetime
+        self.attributes = {}
+        self.tokens = {}
+        self.requests = 0
+        self.token_requests = 0
+        self._token_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def issue_token(self):
+        with self._lock:
+            self.token_requests += 1
+            number = next(self._token_ids)
+            token = f'access-{number}'
+            self.tokens[token] = time.time() + self.token_lifetime
+        return {'access_token': token, 'refresh_token': f'refresh-{number}',
+                'token_type': 'Bearer', 'expires_in': self.token_lifetime, 'scope': ''}
+
+    def authorized(self, header):
+        token = (header or '').replace('Bearer ', '', 1)
+        expires_at = self.tokens.get(token)
+        return expires_at is not None and time.time() < expires_at
+
+    def record(self, type_, id_):
+        attributes = {'name': f'{type_[:-1].title()} {id_}',
+                      'created-at': '2024-01-01T00:00:00.000Z'}
+        if type_ == 'vents':
+            attributes.update({'percent-open': int(id_) % 100, 'duct-temperature-c': 21.5})
+        if type_ == 'pucks':
+            attributes.update({'current-temperature-c': 20.25, 'current-humidity': 40})
+        attributes.update(self.attributes.get((type_, str(id_)), {}))
+        relationships = {}
+        for (parent, rel), (related, count) in RELATIONSHIPS.items():
+            if parent == type_:
+                first = (int(id_) - 1) * count + 1
+                relationships[rel] = {
+                    'data': [{'id': str(i), 'type': related} for i in range(first, first + count)],
+                    'links': {'self': f'/api/{type_}/{id_}/relationships/{rel}',
+                              'related': f'/api/{type_}/{id_}/{rel}'}}
+        return {'id': str(id_), 'type': type_, 'attributes': attributes,
+                'relationships': relationships}
+
+    def collection(self, path, type_, ids, page):
+        start = (page - 1) * self.page_size
+        meta = {}
+        if start + self.page_size < len(ids):
+            meta['next'] = f'{path}?page={page + 1}'
+        return {'meta': meta, 'data': [self.record(type_, i)
+                                       for i in ids[start:start + self.page_size]]}
+
+    def update(self, type_, id_, body):
+        attributes = (body.get('data') or {}).get('attributes') or {}
+        with self._lock:
+            self.attributes.setdefault((type_, str(id_)), {}).update(attributes)
+        return {'data': self.record(type_, id_)}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle delay the body.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def api(self):
+        return self.server.api
+
+    def _reply(self, status, body=None):
+        time.sleep(self.server.latency)
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/vnd.api+json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _route(self, method):
+        with self.api._lock:
+            self.api.requests += 1
+        url = urlsplit(self.path)
+        body = self._body()
+        if url.path == '/oauth2/token' and method == 'POST':
+            return self._reply(200, self.api.issue_token())
+        if url.path == '/api/':
+            links = {t: {'self': f'/api/{t}', 'type': t} for t in RESOURCE_TYPES}
+            return self._reply(200, {'links': links})
+        if not self.api.authorized(self.headers.get('Authorization')):
+            return self._reply(401, {'errors': [{'detail': 'Invalid or expired token'}]})
+        segments = [s for s in url.path.split('/') if s][1:]
+        if not segments or segments[0] not in RESOURCE_TYPES:
+            return self._reply(404, {'errors': [{'detail': 'Not found'}]})
+        page = int(parse_qs(url.query).get('page', ['1'])[0])
+        if len(segments) == 1 and method == 'GET':
+            ids = list(range(1, self.api.records + 1))
+            return self._reply(200, self.api.collection(url.path, segments[0], ids, page))
+        type_, id_ = segments[0], segments[1]
+        if len(segments) == 2 and method == 'GET':
+            return self._reply(200, {'data': self.api.record(type_, id_)})
+        if len(segments) == 2 and method == 'PATCH':
+            return self._reply(200, self.api.update(type_, id_, json.loads(body or b'{}')))
+        if len(segments) == 3 and method == 'GET' and (type_, segments[2]) in RELATIONSHIPS:
+            related, count = RELATIONSHIPS[(type_, segments[2])]
+            first = (int(id_) - 1) * count + 1
+            ids = list(range(first, first + count))
+            return self._reply(200, self.api.collection(url.path, related, ids, page))
+        return self._reply(404, {'errors': [{'detail': 'Not found'}]})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PATCH(self):
+        self._route('PATCH')
+
+
+class StandInServer(object):
+    """Runs the stand-in API on a local port in a background thread."""
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, **api_kwargs):
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.api = StandInApi(**api_kwargs)
+        self.httpd.latency = latency
+        self._thread = None
+
+    @property
+    def api(self):
+        return self.httpd.api
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def _serve(conn, latency, api_kwargs):
+    server = StandInServer(latency=latency, **api_kwargs)
+    conn.send(server.url)
+    conn.close()
+    server.httpd.serve_forever()
+
+
+def serve_in_process(latency=0.0, **api_kwargs):
+    """
+    Starts the stand-in API in a child process, so that its work does not
+    count towards the client's time and memory. Returns (process, url).
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, latency, api_kwargs),
+                                      daemon=True)
+    process.start()
+    url = parent.recv()
+    parent.close()
+    return process, url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--records', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=50)
+    args = parser.parse_args()
+    server = StandInServer(port=args.port, latency=args.latency, records=args.records,
+                           page_size=args.page_size)
+    print(f"Serving the stand-in API on {server.url}")
+    server.httpd.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Runs the client against a local stand-in API server and reports throughput,
+latency percentiles and peak memory for get, concurrent get, pagination,
+update, relationship traversal and token refresh.
+
+Results are written as JSON, so that runs of different releases can be
+compared with --compare, which exits with status 1 if any scenario's
+throughput dropped by more than --threshold.
+
+    python benchmarks/suite.py [--ops 200] [--latency 0.0] [--output results.json]
+                               [--compare benchmarks/results/previous.json]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import datetime
+import tracemalloc
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from flair_api.client import Client
+from server import serve_in_process
+
+
+def op_get(client, i):
+    client.get('structures', i % 20 + 1)
+
+
+def op_paginate(client, i):
+    for _ in client.get('vents'):
+        pass
+
+
+def op_update(client, i):
+    client.update('vents', i % 20 + 1, attributes={'percent-open': i % 100})
+
+
+def op_relationships(client, i):
+    structure = client.get('structures', i % 20 + 1)
+    for room in structure.get_rel('rooms'):
+        list(room.get_rel('vents'))
+
+
+def op_auth_refresh(client, i):
+    client.expires_at = 0
+    client.get('structures', i % 20 + 1)
+
+
+# name -> (operation, concurrent workers or None)
+SCENARIOS = {
+    'get': (op_get, None),
+    'get_concurrent': (op_get, 8),
+    'paginate': (op_paginate, None),
+    'update': (op_update, None),
+    'relationships': (op_relationships, None),
+    'auth_refresh': (op_auth_refresh, None),
+}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def make_benchmark_client(url, workers):
+    client = Client(client_id='bench', client_secret='secret', api_root=url,
+                    pool_maxsize=max(10, workers or 1))
+    client.authenticate()
+    client.api_root_response()
+    return client
+
+
+def timed_ops(client, operation, ops, workers):
+    """Runs operation ops times; returns (elapsed seconds, per-op latencies)."""
+    def timed(i):
+        started = time.perf_counter()
+        operation(client, i)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if workers:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            latencies = list(executor.map(timed, range(ops)))
+    else:
+        latencies = [timed(i) for i in range(ops)]
+    return time.perf_counter() - started, latencies
+
+
+def run_scenario(url, operation, ops, workers, warmup, memory_ops):
+    client = make_benchmark_client(url, workers)
+    requests = []
+    client.after_request.append(requests.append)
+    try:
+        timed_ops(client, operation, warmup, workers)
+        del requests[:]
+        elapsed, latencies = timed_ops(client, operation, ops, workers)
+        request_count = len(requests)
+
+        tracemalloc.start()
+        try:
+            timed_ops(client, operation, memory_ops, workers)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        client.close()
+
+    latencies.sort()
+    return {
+        'ops': ops,
+        'workers': workers or 1,
+        'seconds': elapsed,
+        'ops_per_second': ops / elapsed if elapsed else 0.0,
+        'requests_per_op': request_count / ops if ops else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p90': percentile(latencies, 0.90) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': (latencies[-1] if latencies else 0.0) * 1000,
+        },
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def package_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        return version('flair-client')
+    except PackageNotFoundError:
+        return None
+
+
+def run(scenarios, ops, latency, records, page_size, warmup, memory_ops):
+    process, url = serve_in_process(latency=latency, records=records, page_size=page_size)
+    try:
+        results = {}
+        for name in scenarios:
+            operation, workers = SCENARIOS[name]
+            results[name] = run_scenario(url, operation, ops, workers, warmup, memory_ops)
+            print_result(name, results[name])
+    finally:
+        process.terminate()
+        process.join()
+    return {
+        'metadata': {
+            'version': package_version(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        },
+        'settings': {'ops': ops, 'latency': latency, 'records': records,
+                     'page_size': page_size, 'warmup': warmup, 'memory_ops': memory_ops},
+        'scenarios': results,
+    }
+
+
+def print_result(name, result):
+    latency = result['latency_ms']
+    print(f"{name:<16} {result['ops_per_second']:>9.1f} ops/s  "
+          f"p50 {latency['p50']:>7.2f} ms  p90 {latency['p90']:>7.2f} ms  "
+          f"p99 {latency['p99']:>7.2f} ms  peak {result['peak_memory_kb']:>8.1f} KiB  "
+          f"{result['requests_per_op']:.1f} req/op")
+
+
+def compare(previous, current, threshold):
+    """Prints the change from a previous run; returns the regressed scenarios."""
+    regressions = []
+    print(f"\nCompared with {previous['metadata'].get('version')} "
+          f"({(previous['metadata'].get('commit') or '')[:10]}):")
+    for name, result in current['scenarios'].items():
+        before = previous['scenarios'].get(name)
+        if not before or not before['ops_per_second']:
+            continue
+        change = result['ops_per_second'] / before['ops_per_second'] - 1
+        p99_change = result['latency_ms']['p99'] - before['latency_ms']['p99']
+        flag = ''
+        if change < -threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<16} throughput {change:>+7.1%}  p99 {p99_change:>+8.2f} ms{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ops', type=int, default=200, help="operations per scenario")
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--memory-ops', type=int, default=20,
+                        help="operations run again under tracemalloc to measure peak memory")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="seconds the server waits before each response")
+    parser.add_argument('--records', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="run only this scenario (repeatable)")
+    parser.add_argument('--output', help="JSON results file "
+                        "(default: benchmarks/results/<version>-<timestamp>.json)")
+    parser.add_argument('--compare', help="previous JSON results file to compare with")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="throughput drop counted as a regression (default 0.1)")
+    args = parser.parse_args()
+    # The auth_refresh scenario expires the token on purpose.
+    logging.getLogger().setLevel(logging.ERROR)
+
+    results = run(args.scenario or list(SCENARIOS), args.ops, args.latency, args.records,
+                  args.page_size, args.warmup, args.memory_ops)
+
+    output = args.output
+    if output is None:
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        name = f"{results['metadata']['version'] or 'dev'}-{stamp}.json"
+        output = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results', name)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if compare(previous, results, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
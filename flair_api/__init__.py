@@ -1,10 +1,40 @@
 from .client import make_client, Resource, ApiError, \
-    EmptyBodyException, AuthenticationError
+    EmptyBodyException, AuthenticationError, RateLimitError
+from .cache import ResponseCache
+from .identity_map import IdentityMap
+from .state import StateStore, FileStateStore
+from .rate_limit import RateLimiter
+from .retry import RetryPolicy
+from .coalesce import RequestCoalescer
+from .metrics import MetricsRegistry, RequestInfo, prometheus_text
+from .codec import JsonCodec, available_codecs
+from .watch import Watcher, Change
+from .pool import ClientPool
+from .async_client import make_async_client, AsyncClient, AsyncResource
 
 __all__ = [
     'make_client',
     'Resource',
     'ApiError',
     'EmptyBodyException',
-    'AuthenticationError'
+    'AuthenticationError',
+    'make_async_client',
+    'AsyncClient',
+    'AsyncResource',
+    'ResponseCache',
+    'IdentityMap',
+    'StateStore',
+    'FileStateStore',
+    'RateLimitError',
+    'RateLimiter',
+    'RetryPolicy',
+    'RequestCoalescer',
+    'MetricsRegistry',
+    'RequestInfo',
+    'prometheus_text',
+    'JsonCodec',
+    'available_codecs',
+    'Watcher',
+    'Change',
+    'ClientPool'
 ]
@@ -0,0 +1,760 @@
+import time
+import asyncio
+import logging
+from datetime import timedelta
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - exercised only without the extra
+    httpx = None
+
+from .bulk import run_bulk_async
+from .metrics import RequestInfo, run_hooks
+from .columns import records_to_columns, columns_to_numpy
+from .timeseries import split_windows, default_window_params, iter_windows_async
+from .client import Client, Resource, ResourceCollection, Relationship, \
+    ApiError, AuthenticationError, DEFAULT_CLIENT_HEADERS, NOT_INCLUDED, \
+    query_params, requested_fieldsets, relationship_data, raw_records
+
+
+class AsyncRelationship(Relationship):
+    __slots__ = ()
+
+    async def get(self, **params):
+        if not params:
+            included = self.get_included()
+            if included is not NOT_INCLUDED:
+                return included
+        return await self.client.get_url(self.related_href, **params)
+
+    async def add(self, data):
+        data = data if isinstance(data, list) else [data]
+        rel_form = relationship_data(data)
+        await self.client.post_url(self.self_href, dict(data=rel_form))
+
+    async def update(self, data):
+        rel_form = relationship_data(data)
+        await self.client.patch_url(self.self_href, dict(data=rel_form))
+        self.data = rel_form
+        return self.data
+
+    async def delete(self, data):
+        data = data if isinstance(data, list) else [data]
+        rel_form = relationship_data(data)
+        await self.client.delete_url(self.self_href, dict(data=rel_form))
+
+
+class AsyncResourceCollection(ResourceCollection):
+    async def _get_page(self, url, lazy=None):
+        return await self.client._get_page(url, self.next_page_params(url), lazy=lazy)
+
+    async def load_next_page(self):
+        if self.meta.get('next'):
+            col = await self._get_page(self.meta['next'])
+            if isinstance(col, ResourceCollection):
+                self.resources.extend(col.resources)
+                self.meta = col.meta
+            else:
+                logging.warning(f"Expected ResourceCollection from next page, got {type(col)}")
+                self.meta['next'] = None
+
+    def __iter__(self):
+        raise TypeError("AsyncResourceCollection must be iterated with 'async for'.")
+
+    def read_ahead(self, depth=1):
+        raise TypeError("Read-ahead is not available on AsyncResourceCollection.")
+
+    async def __aiter__(self):
+        current_index = 0
+        while True:
+            if current_index < len(self.resources):
+                yield self.resources[current_index]
+                current_index += 1
+            elif self.meta.get('next'):
+                await self.load_next_page()
+                if current_index >= len(self.resources):
+                     break
+            else:
+                break
+
+    async def stream(self):
+        """Yields all resources page by page without keeping consumed pages."""
+        url = self.meta.get('next')
+        for resource in self.resources:
+            yield resource
+        while url:
+            col = await self._get_page(url)
+            if not isinstance(col, ResourceCollection):
+                logging.warning(f"Expected ResourceCollection from next page, got {type(col)}")
+                break
+            url = col.meta.get('next')
+            resources, col = col.resources, None
+            for resource in resources:
+                yield resource
+
+    async def iter_raw(self):
+        """Yields the raw JSON-API record of every resource page by page without building models."""
+        for record in raw_records(self.resources):
+            yield record
+        url = self.meta.get('next')
+        while url:
+            col = await self._get_page(url, lazy=True)
+            if not isinstance(col, ResourceCollection):
+                logging.warning(f"Expected ResourceCollection from next page, got {type(col)}")
+                break
+            url = col.meta.get('next')
+            for record in raw_records(col.resources):
+                yield record
+
+    async def to_columns(self, fields=None):
+        """Returns the attributes of all resources as columns, {'id': [...], field: [...]}."""
+        return records_to_columns([record async for record in self.iter_raw()], fields)
+
+    async def to_numpy(self, fields=None, dtypes=None):
+        """Returns the attributes of all resources as typed NumPy arrays. Requires NumPy."""
+        return columns_to_numpy(await self.to_columns(fields), dtypes)
+
+    async def all(self):
+        """Yields all resources, loading next pages as needed."""
+        async for resource in self:
+            yield resource
+
+    async def up_to(self, limit):
+        while len(self.resources) < limit and self.meta.get('next'):
+            await self.load_next_page()
+        return self
+
+
+class AsyncResource(Resource):
+    __slots__ = ()
+    relationship_class = AsyncRelationship
+
+    async def get_self(self):
+        if self.client.identity_map is not None:
+            self.client.identity_map.expire(self.type_, self.id_)
+        resp = await self.client.get(self.type_, id=self.id_)
+        self.attributes = resp.attributes
+        self.relationships = resp.relationships
+        self.loaded_fields = resp.loaded_fields
+        return self
+
+    async def get_rel(self, rel, **params):
+        if rel not in self.relationships:
+             raise KeyError(f"Relationship '{rel}' not found for this resource.")
+        return await self.relationships[rel].get(**params)
+
+    async def update(self, attributes={}, relationships={}):
+        resp = await self.client.update(
+            self.type_, self.id_, attributes=attributes, relationships=relationships
+        )
+        self.attributes = resp.attributes
+        self.relationships = resp.relationships
+        self.loaded_fields = resp.loaded_fields
+        return self
+
+    async def delete(self):
+        await self.client.delete(self.type_, self.id_)
+        self.deleted = True
+
+    async def add_rel(self, **kwargs):
+        for rel, val in kwargs.items():
+            if rel not in self.relationships:
+                 raise KeyError(f"Relationship '{rel}' not found. Cannot add.")
+            await self.relationships[rel].add(val)
+
+    async def update_rel(self, **kwargs):
+        for rel, val in kwargs.items():
+            if rel not in self.relationships:
+                 raise KeyError(f"Relationship '{rel}' not found. Cannot update.")
+            await self.relationships[rel].update(val)
+
+    async def delete_rel(self, **kwargs):
+        for rel, val in kwargs.items():
+            if rel not in self.relationships:
+                 raise KeyError(f"Relationship '{rel}' not found. Cannot delete.")
+            await self.relationships[rel].delete(val)
+
+
+class AsyncClient(Client):
+    """
+    asyncio counterpart of Client built on httpx.
+
+    Accepts the same options as Client. Mapped model classes must inherit
+    from AsyncResource so that their network methods are awaitable.
+    """
+    collection_class = AsyncResourceCollection
+
+    def __init__(self, *args, default_model=AsyncResource, **kwargs):
+        if httpx is None:
+            raise ImportError(
+                "AsyncClient requires httpx. Install it with: pip install flair-client[async]"
+            )
+        # asyncio locks are created on first use, inside the running loop.
+        self._async_auth_lock = None
+        self._async_root_lock = None
+        self._async_concurrency = None
+        self._refresher_task = None
+        # Background revalidation of API root links restored from a state store.
+        self._revalidation = None
+        self._store_executor = None
+        super().__init__(*args, default_model=default_model, **kwargs)
+
+    def _store_thread(self):
+        # State stores block on file locks and I/O, and their lock must be
+        # released by the thread that took it, so all store access runs on
+        # one dedicated thread, in the order it was requested.
+        if self._store_executor is None:
+            self._store_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='flair-state-store')
+        return self._store_executor
+
+    async def _in_store_thread(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._store_thread(), fn, *args)
+
+    def save_state(self, tokens=True, links=True):
+        """
+        Persists tokens and/or API root links to the state store. Inside a
+        running event loop the write is queued on the store thread instead
+        of blocking the loop.
+        """
+        if self.state_store is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return super().save_state(tokens, links)
+        self._store_thread().submit(super().save_state, tokens, links)
+
+    async def _adopt_stored_token(self):
+        if self.state_store is None:
+            return False
+        return await self._in_store_thread(self.adopt_stored_token)
+
+    @asynccontextmanager
+    async def _state_store_locked(self):
+        """
+        Holds the state store lock, as the sync client does around token
+        renewal, without blocking the event loop while waiting for it.
+        """
+        if self.state_store is None:
+            yield
+            return
+        executor = self._store_thread()
+        lock = self.state_store.lock()
+        entered = asyncio.get_running_loop().run_in_executor(executor, lock.__enter__)
+        try:
+            await asyncio.shield(entered)
+        except asyncio.CancelledError:
+            def release(future):
+                if not future.cancelled() and future.exception() is None:
+                    executor.submit(lock.__exit__, None, None, None)
+            entered.add_done_callback(release)
+            raise
+        try:
+            yield
+        finally:
+            await self._in_store_thread(lock.__exit__, None, None, None)
+
+    def _build_session(self, pool_connections, pool_maxsize, pool_block):
+        """Creates an httpx.AsyncClient holding a pool of keep-alive connections."""
+        limits = httpx.Limits(
+            max_connections=pool_maxsize if pool_block else None,
+            max_keepalive_connections=pool_maxsize,
+            keepalive_expiry=self.idle_timeout,
+        )
+        return httpx.AsyncClient(limits=limits)
+
+    def reap_idle_connections(self):
+        """httpx expires idle connections itself using keepalive_expiry."""
+        return False
+
+    async def _send(self, method, url, **kwargs):
+        """Sends an HTTP request through the client's pooled httpx session."""
+        if not self.keep_alive:
+            headers = dict(kwargs.pop('headers', None) or {})
+            headers['Connection'] = 'close'
+            kwargs['headers'] = headers
+        params = kwargs.pop('params', None)
+        if params:
+            # httpx replaces the query string of the URL with params, which
+            # would drop e.g. the page of a meta['next'] link, so merge them.
+            url = httpx.URL(url).copy_merge_params(params)
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
+        try:
+            return await self.session.request(method, url, **kwargs)
+        finally:
+            self._last_used = time.monotonic()
+
+    async def close(self):
+        """Closes pooled connections. Sessions passed in by the caller are left open."""
+        self.stop_token_refresher()
+        if self._revalidation is not None:
+            self._revalidation.cancel()
+            self._revalidation = None
+        if self._store_executor is not None:
+            # Queued state writes still run.
+            self._store_executor.shutdown(wait=False)
+            self._store_executor = None
+        if self._owns_session:
+            await self.session.aclose()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with AsyncClient.")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _auth_legacy(self):
+        """Authenticate using the original /oauth/token endpoint."""
+        token_url = self.create_url("/oauth/token")
+        payload = self._legacy_payload()
+        logging.info("Attempting Legacy Authentication...")
+        resp = await self._send('POST', token_url, data=payload)
+        return self._process_legacy_token_response(resp)
+
+    async def _auth_oauth2(self, grant_type_override=None):
+        """Authenticate using OAuth 2.0 /oauth2/token endpoint."""
+        token_url = self.create_url("/oauth2/token")
+        current_grant_type = grant_type_override or self.grant_type
+        logging.info(f"Attempting OAuth 2.0 Authentication (grant_type: {current_grant_type})...")
+        payload = self._oauth2_payload(current_grant_type)
+
+        resp = await self._send('POST', token_url, data=payload)
+        status_code = self._process_token_response(resp)
+        logging.info(f"OAuth 2.0 Authentication ({current_grant_type}) Successful.")
+        if current_grant_type == 'authorization_code':
+            self.auth_code = None
+        return status_code
+
+    async def authenticate(self):
+        """Get the initial access token based on configuration."""
+        try:
+            if self.oauth_version == 2:
+                return await self._auth_oauth2()
+            elif self.oauth_version == 1:
+                return await self._auth_legacy()
+            else:
+                raise ValueError(f"Unsupported oauth_version: {self.oauth_version}")
+        except AuthenticationError as e:
+            logging.error(f"Initial authentication failed: {e}")
+            if self.oauth_version == 2 and self.fallback_to_legacy_auth:
+                logging.info("Attempting fallback to legacy authentication...")
+                try:
+                    return await self._auth_legacy()
+                except AuthenticationError as fallback_e:
+                    logging.error(f"Legacy fallback authentication also failed: {fallback_e}")
+                    raise fallback_e
+            else:
+                raise e
+
+    async def refresh_oauth2_token(self):
+        """Refresh the OAuth 2.0 token using the refresh token."""
+        async with self._state_store_locked():
+            # Another process may have rotated the refresh token.
+            await self._adopt_stored_token()
+            return await self._refresh_oauth2_token()
+
+    async def _refresh_oauth2_token(self):
+        if not self.refresh_token:
+            logging.error("No refresh token available. Cannot refresh.")
+            raise AuthenticationError("Refresh token missing, cannot refresh.")
+
+        logging.info("Access token expired or nearing expiry. Refreshing...")
+        try:
+            return await self._auth_oauth2(grant_type_override='refresh_token')
+        except AuthenticationError as e:
+            logging.error(f"Failed to refresh token: {e}")
+            self.access_token = None
+            self.refresh_token = None
+            self.expires_at = None
+            raise e
+
+    async def _ensure_valid_token(self):
+        """Checks if token exists and is valid, refreshes if needed."""
+        if not self._token_needs_renewal():
+            return
+        if self._async_auth_lock is None:
+            self._async_auth_lock = asyncio.Lock()
+        async with self._async_auth_lock:
+            # Only one task renews; the others wait here and reuse its token.
+            if not self._token_needs_renewal():
+                return
+            if self.access_token is not None:
+                logging.warning("Access token expired.")
+            async with self._state_store_locked():
+                # Likewise, only one process renews a shared token.
+                await self._adopt_stored_token()
+                if self._token_needs_renewal():
+                    await self._renew_token()
+
+    async def _renew_token(self):
+        if self.access_token is None:
+            logging.info("No access token found. Authenticating...")
+            await self.authenticate()
+        else:
+            if self.oauth_version == 2 and self.refresh_token:
+                try:
+                    await self.refresh_oauth2_token()
+                except AuthenticationError:
+                    logging.warning("Token refresh failed. Attempting full re-authentication...")
+                    await self.authenticate()
+            else:
+                 logging.warning("No refresh mechanism or not OAuth 2.0. Re-authenticating fully...")
+                 await self.authenticate()
+
+    async def _renew_ahead(self):
+        """Renews a still valid token, keeping it if renewal fails. See Client._renew_ahead."""
+        if self.oauth_version == 2 and self.refresh_token:
+            return await self._auth_oauth2(grant_type_override='refresh_token')
+        return await self.authenticate()
+
+    async def _run_token_refresher(self):
+        while True:
+            delay = self._refresh_ahead_delay()
+            if delay is not None and delay <= 0:
+                try:
+                    if self._async_auth_lock is None:
+                        self._async_auth_lock = asyncio.Lock()
+                    async with self._async_auth_lock, self._state_store_locked():
+                        await self._adopt_stored_token()
+                        delay = self._refresh_ahead_delay()
+                        if delay is not None and delay <= 0:
+                            logging.info("Renewing access token ahead of expiry.")
+                            await self._renew_ahead()
+                    delay = self._refresh_ahead_delay()
+                except (ApiError, httpx.HTTPError) as e:
+                    logging.warning(f"Background token renewal failed: {e}")
+                    delay = 5.0
+            # Always sleep between checks: the task must never spin on the loop.
+            await asyncio.sleep(min(max(delay, 1.0), 5.0) if delay is not None else 1.0)
+
+    def start_token_refresher(self, refresh_ahead=None):
+        """
+        Starts an asyncio task that renews the token once `refresh_ahead` of
+        its lifetime has passed. Outside a running event loop this does
+        nothing; make_async_client starts the task when refresh_ahead is set.
+        """
+        if refresh_ahead is not None:
+            self.refresh_ahead = refresh_ahead
+        if not self.refresh_ahead or not 0 < self.refresh_ahead < 1:
+            raise ValueError("refresh_ahead must be a fraction between 0 and 1.")
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._refresher_task is None:
+            self._refresher_task = loop.create_task(self._run_token_refresher())
+
+    def stop_token_refresher(self):
+        """Stops the background token refresher, if running."""
+        if self._refresher_task is not None:
+            self._refresher_task.cancel()
+            self._refresher_task = None
+
+    async def api_root_response(self):
+        """Fetches and caches the API root links."""
+        url = self.create_url("/api/")
+        try:
+            resp = await self._send('GET', url, headers=DEFAULT_CLIENT_HEADERS)
+        except httpx.HTTPError as e:
+            logging.error(f"Error fetching API root {url}: {e}")
+            raise ApiError(None) from e
+        if resp.status_code >= 400:
+            logging.error(f"Error fetching API root {url}: HTTP {resp.status_code}")
+            raise ApiError(resp)
+        try:
+            self.api_root_resp = self.codec.decode(resp).get('links')
+        except ValueError:
+            raise ApiError(resp)
+        if not self.api_root_resp:
+             logging.warning(f"No 'links' found in API root response from {url}")
+        else:
+            self.save_state(tokens=False)
+        return resp.status_code
+
+    async def revalidate_api_root(self):
+        """Refetches the API root links, logging instead of raising on failure."""
+        try:
+            await self.api_root_response()
+        except ApiError as e:
+            logging.warning(f"Failed to revalidate API root links: {e}")
+
+    async def _fetch_api_root_if_not(self):
+        """Ensures API root links are fetched."""
+        if self.api_root_resp is None:
+            if self._async_root_lock is None:
+                self._async_root_lock = asyncio.Lock()
+            async with self._async_root_lock:
+                if self.api_root_resp is None:
+                    return await self.api_root_response()
+
+    async def resource_url(self, resource_type, id=None):
+        """Constructs URL for a resource type, using cached root links."""
+        await self._fetch_api_root_if_not()
+        return self._resource_url_from_root(resource_type, id)
+
+    async def _make_request(self, method, url, headers=None, params=None, json_data=None, lazy=None):
+        """Internal helper to make authenticated requests."""
+        if method == 'GET' and self.coalescer is not None:
+            key = self.coalescer.key(url, params, headers, self._cache_identity())
+            document = await self.coalescer.run_async(
+                key, lambda: self._request_document(method, url, headers, params, json_data))
+        else:
+            document = await self._request_document(method, url, headers, params, json_data)
+        result = self._models_from_document(document, requested_fieldsets(params), lazy)
+        return self._carry_query(result, params)
+
+    async def _request_document(self, method, url, headers=None, params=None, json_data=None):
+        """Sends an authenticated request and returns its decoded response document."""
+        if not self.before_request and not self.after_request:
+            return await self._fetch_document(method, url, headers, params, json_data)
+        info = RequestInfo(method, url)
+        run_hooks(self.before_request, info)
+        started = time.perf_counter()
+        try:
+            return await self._fetch_document(method, url, headers, params, json_data, info)
+        except ApiError as e:
+            info.error = e
+            info.retries = e.retries
+            raise
+        finally:
+            info.latency = time.perf_counter() - started
+            run_hooks(self.after_request, info)
+
+    async def _fetch_document(self, method, url, headers=None, params=None, json_data=None,
+                              info=None):
+        await self._ensure_valid_token()
+        await self._fetch_api_root_if_not()
+
+        request_headers = self.token_header()
+        request_headers.update(DEFAULT_CLIENT_HEADERS)
+        if self.user_agent:
+            request_headers['User-Agent'] = self.user_agent
+        if headers:
+            request_headers.update(headers)
+
+        cache_key, cache_entry = self._cache_lookup(method, url, params, request_headers)
+        if cache_entry is not None and self.cache.is_fresh(cache_entry):
+            if info is not None:
+                info.cached = True
+            return cache_entry.document()
+
+        body = self.codec.dumps(json_data) if json_data is not None else None
+        started = time.monotonic()
+        retries = 0
+        delay = 0.0
+        while True:
+            try:
+                resp = await self._send_throttled(method, url, request_headers, params, body,
+                                                  started)
+            except httpx.TransportError as e:
+                sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                delay = self._retry_delay(method, retries, started, delay, error=e, sent=sent)
+                if delay is None:
+                    error = ApiError(None)
+                    error.retries = retries
+                    raise error from e
+            except httpx.HTTPError as e:
+                raise ApiError(None) from e
+            else:
+                delay = self._retry_delay(method, retries, started, delay, resp=resp)
+                if delay is None:
+                    break
+            retries += 1
+            logging.warning(f"Retrying {method} {url} in {delay:.2f}s (retry {retries}).")
+            await asyncio.sleep(delay)
+
+        if info is not None:
+            info.record_response(resp, body, retries)
+        try:
+            return self._cacheable_document(resp, method, url, cache_key, cache_entry)
+        except ApiError as e:
+            e.retries = retries
+            raise
+
+    async def _send_throttled(self, method, url, request_headers, params, body, started=None):
+        """Sends a request, pacing it with the rate limiter and resending throttled attempts."""
+        throttled = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            if self.max_concurrency and self._async_concurrency is None:
+                self._async_concurrency = asyncio.Semaphore(self.max_concurrency)
+            timeout = self._attempt_timeout(started)
+            if self._async_concurrency is not None:
+                async with self._async_concurrency:
+                    resp = await self._send(method=method, url=url, headers=request_headers,
+                                            params=params, content=body, timeout=timeout)
+            else:
+                resp = await self._send(method=method, url=url, headers=request_headers,
+                                        params=params, content=body, timeout=timeout)
+            if not self._should_retry_throttled(resp, throttled):
+                return resp
+            throttled += 1
+
+    async def get(self, resource_type, id=None, params=None, include=None, fields=None):
+        params = query_params(params, include, fields)
+        resource = self._identity_map_hit(resource_type, id, params)
+        if resource is not None:
+            return resource
+        full_url = await self.resource_url(resource_type, id)
+        return await self._make_request('GET', full_url, params=params)
+
+    async def get_url(self, url, **params):
+        return await self._get_page(url, params)
+
+    async def _get_page(self, url, params=None, lazy=None):
+        if not url.startswith(self.api_root):
+            full_url = self.create_url(url)
+        else:
+            full_url = url
+        return await self._make_request('GET', full_url, params=query_params(params), lazy=lazy)
+
+    async def update(self, resource_type, id, attributes={}, relationships={}):
+        full_url = await self.resource_url(resource_type, id)
+        rels = self.to_relationship_dict(relationships)
+        req_body = {'data': {
+            'id': str(id),
+            'type': resource_type,
+            'attributes': attributes,
+            **({'relationships': rels} if rels else {})
+        }}
+
+        return await self._make_request('PATCH', full_url, json_data=req_body)
+
+    async def patch_url(self, url, data):
+        if not url.startswith(self.api_root):
+            full_url = self.create_url(url)
+        else:
+           full_url = url
+        return await self._make_request('PATCH', full_url, json_data=data)
+
+    async def delete(self, resource_type, id):
+        full_url = await self.resource_url(resource_type, id)
+        resp = await self._make_request('DELETE', full_url)
+        if self.identity_map is not None:
+            self.identity_map.discard(resource_type, id)
+        return resp
+
+    async def delete_url(self, url, data=None):
+        if not url.startswith(self.api_root):
+            full_url = self.create_url(url)
+        else:
+           full_url = url
+        return await self._make_request('DELETE', full_url, json_data=data)
+
+    async def create(self, resource_type, attributes={}, relationships={}, params={}):
+        collection_url = await self.resource_url(resource_type, id=None)
+        rels = self.to_relationship_dict(relationships)
+        req_body = {'data': {
+            'type': resource_type,
+            'attributes': attributes,
+             **({'relationships': rels} if rels else {})
+        }}
+
+        return await self._make_request('POST', collection_url, params=params, json_data=req_body)
+
+    async def post_url(self, url, data, params=None):
+        if not url.startswith(self.api_root):
+            full_url = self.create_url(url)
+        else:
+           full_url = url
+        return await self._make_request('POST', full_url, params=params, json_data=data)
+
+    async def _prepare_bulk(self):
+        """Authenticates and discovers the API root once before fanning out."""
+        await self._ensure_valid_token()
+        await self._fetch_api_root_if_not()
+
+    async def bulk_update(self, items, max_workers=None):
+        """Updates many resources concurrently. See Client.bulk_update."""
+        await self._prepare_bulk()
+        return await run_bulk_async(self.update, items, max_workers or self.pool_maxsize)
+
+    async def bulk_create(self, items, max_workers=None):
+        """Creates many resources concurrently. See Client.bulk_create."""
+        await self._prepare_bulk()
+        return await run_bulk_async(self.create, items, max_workers or self.pool_maxsize)
+
+    async def bulk_delete(self, items, max_workers=None):
+        """Deletes many resources concurrently. See Client.bulk_delete."""
+        await self._prepare_bulk()
+        return await run_bulk_async(self.delete, items, max_workers or self.pool_maxsize)
+
+    def _window_fetcher(self, url, params, timestamp_field, window_params):
+        window_params = window_params or (
+            lambda start, end: default_window_params(timestamp_field, start, end))
+
+        async def fetch_window(start, end):
+            col = await self.get_url(url, **dict(params or {}, **window_params(start, end)))
+            if col is None:
+                return []
+            if isinstance(col, ResourceCollection):
+                return [resource async for resource in col.stream()]
+            return [col]
+        return fetch_window
+
+    async def get_time_range(self, url, start, end, window=timedelta(days=1), max_workers=None,
+                             timestamp_field='created-at', window_params=None, params=None):
+        """Yields resources between start and end in timestamp order. See Client.get_time_range."""
+        await self._prepare_bulk()
+        fetch_window = self._window_fetcher(url, params, timestamp_field, window_params)
+        async for resource in iter_windows_async(
+                fetch_window, split_windows(start, end, window),
+                max_workers or self.pool_maxsize, timestamp_field):
+            yield resource
+
+
+async def make_async_client(client_id, client_secret, root="https://api.flair.co/",
+                            mapper={}, admin=False, default_model=AsyncResource,
+                            revalidate_state=True, **kwargs):
+    """
+    Factory coroutine to create and initialize an AsyncClient.
+
+    Accepts the same keyword options as make_client. Handles initial
+    authentication and API root fetching, reusing saved state when a
+    state_store is given.
+    """
+    c = AsyncClient(
+       client_id=client_id,
+       client_secret=client_secret,
+       api_root=root,
+       mapper=mapper,
+       admin=admin,
+       default_model=default_model,
+       **kwargs
+    )
+    restored = c.state_store is not None and await c._in_store_thread(c.load_state)
+    if restored:
+        logging.info("Restored client state; skipping authentication and API root fetch.")
+    else:
+        try:
+            if c.access_token is None:
+                await c.authenticate()
+            else:
+                await c._ensure_valid_token()
+        except AuthenticationError as e:
+            logging.error(f"FATAL: Client initialization failed - Could not authenticate.")
+            await c.close()
+            raise e
+
+    if c.refresh_ahead is not None:
+        c.start_token_refresher()
+
+    if c.api_root_resp is not None:
+        if revalidate_state:
+            c._revalidation = asyncio.ensure_future(c.revalidate_api_root())
+        return c
+
+    try:
+        await c.api_root_response()
+    except ApiError as e:
+         logging.warning(f"Failed to fetch API root during client initialization: {e}")
+
+    return c
@@ -0,0 +1,116 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BulkItemResult(object):
+    """Outcome of a single item of a bulk operation."""
+    def __init__(self, index, item, result=None, error=None, elapsed=0.0):
+        self.index = index
+        self.item = item
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        outcome = 'ok' if self.ok else f'error={self.error!r}'
+        return f"{self.__class__.__name__}<#{self.index} {outcome} {self.elapsed:.3f}s>"
+
+
+class BulkResult(object):
+    """Per-item results and timing statistics of a bulk operation."""
+    def __init__(self, items, elapsed):
+        self.items = items
+        self.elapsed = elapsed
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, idx):
+        return self.items[idx]
+
+    @property
+    def ok(self):
+        return all(item.ok for item in self.items)
+
+    @property
+    def succeeded(self):
+        return [item for item in self.items if item.ok]
+
+    @property
+    def failed(self):
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def errors(self):
+        """Maps the index of each failed item to its exception."""
+        return {item.index: item.error for item in self.failed}
+
+    def stats(self):
+        """Returns counts, wall time and per-item latency statistics."""
+        latencies = sorted(item.elapsed for item in self.items)
+        count = len(latencies)
+        return {
+            'count': count,
+            'succeeded': count - len(self.failed),
+            'failed': len(self.failed),
+            'elapsed': self.elapsed,
+            'throughput': count / self.elapsed if self.elapsed else 0.0,
+            'latency_min': latencies[0] if latencies else 0.0,
+            'latency_mean': sum(latencies) / count if count else 0.0,
+            'latency_p50': latencies[count // 2] if latencies else 0.0,
+            'latency_max': latencies[-1] if latencies else 0.0,
+        }
+
+
+def run_bulk(fn, items, max_workers):
+    """
+    Calls fn for every item on a pool of at most max_workers threads.
+
+    Items may be tuples (passed positionally) or dicts (passed as keyword
+    arguments). Exceptions are recorded per item instead of being raised.
+    """
+    items = list(items)
+
+    def run_one(index, item):
+        start = time.monotonic()
+        try:
+            result = fn(**item) if isinstance(item, dict) else fn(*item)
+            return BulkItemResult(index, item, result=result,
+                                  elapsed=time.monotonic() - start)
+        except Exception as e:
+            return BulkItemResult(index, item, error=e,
+                                  elapsed=time.monotonic() - start)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(executor.map(run_one, range(len(items)), items))
+    return BulkResult(results, time.monotonic() - start)
+
+
+async def run_bulk_async(fn, items, max_concurrency):
+    """Awaits fn for every item with at most max_concurrency in flight."""
+    items = list(items)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(index, item):
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                result = await (fn(**item) if isinstance(item, dict) else fn(*item))
+                return BulkItemResult(index, item, result=result,
+                                      elapsed=time.monotonic() - start)
+            except Exception as e:
+                return BulkItemResult(index, item, error=e,
+                                      elapsed=time.monotonic() - start)
+
+    start = time.monotonic()
+    results = await asyncio.gather(*(run_one(i, item) for i, item in enumerate(items)))
+    return BulkResult(list(results), time.monotonic() - start)
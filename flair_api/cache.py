@@ -0,0 +1,158 @@
+import time
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+
+def _url_path(url):
+    return urlsplit(url).path.rstrip('/')
+
+
+def _copy_record(record):
+    if not isinstance(record, dict):
+        return record
+    return dict(record, attributes=dict(record.get('attributes') or {}))
+
+
+def copy_document(body):
+    """
+    Copies a decoded JSON-API document deeply enough (meta and record
+    attributes) for models built from the copy not to share state with
+    models built from the original. Other values are returned as is.
+    """
+    if not isinstance(body, dict):
+        return body
+    body = dict(body)
+    if isinstance(body.get('meta'), dict):
+        body['meta'] = dict(body['meta'])
+    data = body.get('data')
+    if isinstance(data, list):
+        body['data'] = [_copy_record(r) for r in data]
+    elif isinstance(data, dict):
+        body['data'] = _copy_record(data)
+    if isinstance(body.get('included'), list):
+        body['included'] = [_copy_record(r) for r in body['included']]
+    return body
+
+
+class CacheEntry(object):
+    def __init__(self, url, body, etag=None, last_modified=None):
+        self.url = url
+        self.path = _url_path(url)
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = time.monotonic()
+
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+    def document(self):
+        """
+        Returns a copy of the cached document that models can be built from
+        without later changes to their attributes or meta leaking back into
+        the cache.
+        """
+        return copy_document(self.body)
+
+    def validators(self):
+        """Returns the conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """
+    Size-bounded LRU cache of decoded GET response documents.
+
+    Entries younger than `fresh_for` seconds are served without a request.
+    Older entries are revalidated with If-None-Match / If-Modified-Since, and
+    a 304 response reuses the cached document. Entries are dropped after
+    `ttl` seconds. A cache may be shared between clients; keys include the
+    credentials identity of the client.
+    """
+    def __init__(self, max_entries=256, ttl=300, fresh_for=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.fresh_for = fresh_for
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params, identity):
+        params = tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+        return (url, params, identity)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Returns the entry for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl is not None and entry.age() >= self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry):
+        """Returns True, and counts a hit, if entry can be served without a request."""
+        if entry.age() < self.fresh_for:
+            self.hits += 1
+            return True
+        return False
+
+    def store(self, key, url, body, headers):
+        """Stores a decoded document along with the response's validators."""
+        entry = CacheEntry(url, body,
+                           etag=headers.get('ETag'),
+                           last_modified=headers.get('Last-Modified'))
+        if not self.fresh_for and not entry.validators():
+            return None
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def revalidated(self, entry):
+        """Marks an entry as confirmed unchanged by the server."""
+        entry.stored_at = time.monotonic()
+        self.revalidations += 1
+
+    def invalidate(self, url):
+        """
+        Drops entries affected by a write to url: the resource itself, its
+        sub-resources, the collections above it and, for relationship links,
+        the matching related resource link.
+        """
+        path = _url_path(url)
+        paths = {path}
+        if '/relationships/' in path:
+            base, rel = path.split('/relationships/', 1)
+            paths.add(base + '/' + rel)
+
+        def affected(entry_path):
+            return any(p == entry_path or p.startswith(entry_path + '/') or
+                       entry_path.startswith(p + '/') for p in paths)
+
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if affected(e.path)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,13 +1,49 @@
 import requests
 import time
+import queue
 import logging
-from urllib.parse import urljoin
+import threading
+from datetime import timedelta
+from collections.abc import MutableMapping, MutableSequence
+from urllib.parse import urljoin, urlsplit, parse_qs
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .bulk import run_bulk
+from .cache import ResponseCache
+from .coalesce import RequestCoalescer
+from .metrics import RequestInfo, run_hooks
+from .codec import default_codec, get_codec
+from .columns import records_to_columns, columns_to_numpy
+from .timeseries import split_windows, default_window_params, iter_windows
+from .state import token_is_valid
+from .rate_limit import RateLimiter, parse_retry_after
+from .retry import RetryPolicy
 
 DEFAULT_CLIENT_HEADERS = {
     'Accept': 'application/vnd.api+json',
     'Content-Type': 'application/json'
 }
 
+def connection_never_established(error):
+    """
+    True if a requests exception means no connection to the API was made
+    (connect timeout or refused connection), so the request was never sent.
+    """
+    seen = set()
+    pending = [error]
+    while pending:
+        e = pending.pop()
+        if not isinstance(e, BaseException) or id(e) in seen:
+            continue
+        seen.add(id(e))
+        if isinstance(e, (requests.exceptions.ConnectTimeout, NewConnectionError)):
+            return True
+        # requests wraps urllib3's MaxRetryError, whose reason is the original error.
+        pending.extend([e.__cause__, e.__context__, getattr(e, 'reason', None)])
+        pending.extend(e.args)
+    return False
+
 def relationship_data(data):
     return [m.to_relationship() for m in data] \
         if isinstance(data, list) else data.to_relationship()
@@ -21,11 +57,20 @@ class EmptyBodyException(Exception):
             str(self.status_code) + ">"
 
 class ApiError(Exception):
-    def __init__(self, resp):
+    def __init__(self, resp, codec=None):
+        # Number of times the failed request was retried before giving up.
+        self.retries = 0
+        if resp is None or isinstance(resp, str):
+            # Raised without an HTTP response (e.g. connection failure).
+            self.status_code = None
+            self.body = resp or ''
+            self.json_body = None
+            self.error_details = None
+            return
         self.status_code = resp.status_code
         self.body = resp.text
         try:
-            self.json_body = resp.json()
+            self.json_body = (codec or default_codec).decode(resp)
             self.error_details = self.json_body.get('errors') or self.json_body.get('error_description') or self.json_body.get('error')
         except ValueError:
             self.json_body = None
@@ -41,15 +86,77 @@ class AuthenticationError(ApiError):
     """Specific error for authentication failures."""
     pass
 
+class RateLimitError(ApiError):
+    """Raised when the API throttles a request (HTTP 429)."""
+    def __init__(self, resp, codec=None):
+        super().__init__(resp, codec)
+        headers = getattr(resp, 'headers', None) or {}
+        self.retry_after = parse_retry_after(headers.get('Retry-After'))
+
+NOT_INCLUDED = object()
+
+def query_params(params, include=None, fields=None):
+    """
+    Returns request params with JSON-API include paths and sparse fieldsets
+    ({type: [attribute, ...]}) encoded as query parameters.
+    """
+    params = dict(params or {})
+    if include is not None:
+        params['include'] = include
+    if isinstance(params.get('include'), (list, tuple, set)):
+        params['include'] = ','.join(params['include'])
+    if fields is None:
+        fields = params.pop('fields', None) if isinstance(params.get('fields'), dict) else None
+    for type_, names in (fields or {}).items():
+        params[f'fields[{type_}]'] = names if isinstance(names, str) else ','.join(names)
+    return params
+
+def requested_fieldsets(params):
+    """Returns the sparse fieldsets in request params as {type: frozenset(names)}."""
+    return {k[len('fields['):-1]: frozenset(n for n in str(v).split(',') if n)
+            for k, v in (params or {}).items()
+            if k.startswith('fields[') and k.endswith(']')}
+
 class Relationship(object):
+    __slots__ = ('client', 'rel', 'self_href', 'related_href', 'data', 'included', 'fieldsets')
+
     def __init__(self, rel, client, rel_data):
         self.client = client
         self.rel = rel
         self.self_href = rel_data.get('links', {}).get('self', '')
         self.related_href = rel_data.get('links', {}).get('related', '')
         self.data = rel_data.get('data', {})
+        # Records of the compound document this relationship was loaded with,
+        # and the sparse fieldsets that document was requested with.
+        self.included = None
+        self.fieldsets = None
+
+    def get_included(self):
+        """
+        Resolves the relationship from the records included with the
+        response it was loaded from. Returns NOT_INCLUDED if any related
+        record is missing.
+        """
+        if self.included is None or self.data == {}:
+            return NOT_INCLUDED
+        if self.data is None:
+            return None
+        linkage = self.data if isinstance(self.data, list) else [self.data]
+        records = [self.included.get((r.get('type'), str(r.get('id')))) for r in linkage]
+        if any(record is None for record in records):
+            return NOT_INCLUDED
+        resources = [self.client.model_from_record(r, self.included, self.fieldsets)
+                     for r in records]
+        if not isinstance(self.data, list):
+            return resources[0]
+        type_ = resources[0].type_ if resources else None
+        return self.client.collection_class(self.client, {}, type_, resources)
 
     def get(self, **params):
+        if not params:
+            included = self.get_included()
+            if included is not NOT_INCLUDED:
+                return included
         return self.client.get_url(self.related_href, **params)
 
     def add(self, data):
@@ -73,16 +180,194 @@ class Relationship(object):
         rel_form = relationship_data(data)
         self.client.delete_url(self.self_href, dict(data=rel_form))
 
+class Relationships(MutableMapping):
+    """
+    A resource's relationships by name. Relationship objects are only
+    built from the record's raw relationship data when first accessed, as
+    most relationships of most loaded resources are never used.
+    """
+    __slots__ = ('client', 'relationship_class', 'included', 'fieldsets', '_raw', '_built')
+
+    def __init__(self, client, relationship_class, raw):
+        self.client = client
+        self.relationship_class = relationship_class
+        self.included = None
+        self.fieldsets = None
+        self._raw = raw
+        self._built = None
+
+    def __getitem__(self, rel):
+        if self._built is not None and rel in self._built:
+            return self._built[rel]
+        relationship = self.relationship_class(rel, self.client, self._raw[rel])
+        relationship.included = self.included
+        relationship.fieldsets = self.fieldsets
+        if self._built is None:
+            self._built = {}
+        self._built[rel] = relationship
+        return relationship
+
+    def __setitem__(self, rel, relationship):
+        if self._built is None:
+            self._built = {}
+        self._built[rel] = relationship
+
+    def __delitem__(self, rel):
+        found = False
+        if self._built is not None and rel in self._built:
+            del self._built[rel]
+            found = True
+        if rel in self._raw:
+            self._raw = {k: v for k, v in self._raw.items() if k != rel}
+            found = True
+        if not found:
+            raise KeyError(rel)
+
+    def __contains__(self, rel):
+        return rel in self._raw or (self._built is not None and rel in self._built)
+
+    def __iter__(self):
+        yield from self._raw
+        if self._built is not None:
+            yield from (rel for rel in self._built if rel not in self._raw)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"<Relationships {list(self)}>"
+
+    def attach_included(self, included, fieldsets=None):
+        self.included = included
+        self.fieldsets = fieldsets
+        for relationship in (self._built or {}).values():
+            relationship.included = included
+            relationship.fieldsets = fieldsets
+
+    def merged(self, raw):
+        """Returns these relationships updated with newly loaded raw relationship data."""
+        merged = Relationships(self.client, self.relationship_class, dict(self._raw, **raw))
+        if self._built:
+            merged._built = {rel: r for rel, r in self._built.items() if rel not in raw} or None
+        merged.included = self.included
+        merged.fieldsets = self.fieldsets
+        return merged
+
+def resource_record(resource):
+    """Returns a JSON-API record with a resource's identity and attributes."""
+    return {'id': resource.id_, 'type': resource.type_, 'attributes': resource.attributes}
+
+class LazyResources(MutableSequence):
+    """
+    The resources of a collection page, kept as raw JSON-API records until
+    accessed. Models are built on first access and then reused, so callers
+    that only look at a few resources of a large page do not pay for
+    building all of them.
+    """
+    __slots__ = ('client', '_records', '_models', '_contexts')
+
+    def __init__(self, client, records=(), included=None, fieldsets=None):
+        self.client = client
+        self._records = list(records)
+        self._models = [None] * len(self._records)
+        # (included, fieldsets) of the document each record came from
+        context = (included, fieldsets)
+        self._contexts = [context] * len(self._records)
+
+    def _build(self, i):
+        model = self._models[i]
+        if model is None:
+            included, fieldsets = self._contexts[i]
+            model = self._models[i] = self.client.model_from_record(
+                self._records[i], included, fieldsets)
+        return model
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._build(i) for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("list index out of range")
+        return self._build(idx)
+
+    def __setitem__(self, idx, model):
+        if isinstance(idx, slice):
+            model = list(model)
+            self._records[idx] = [None] * len(model)
+            self._contexts[idx] = [None] * len(model)
+        else:
+            self._records[idx] = None
+            self._contexts[idx] = None
+        self._models[idx] = model
+
+    def __delitem__(self, idx):
+        del self._records[idx]
+        del self._models[idx]
+        del self._contexts[idx]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        i = 0
+        while i < len(self):
+            yield self._build(i)
+            i += 1
+
+    def __repr__(self):
+        return f"<LazyResources {len(self)} records, {self.materialized} built>"
+
+    def insert(self, idx, model):
+        self._records.insert(idx, None)
+        self._contexts.insert(idx, None)
+        self._models.insert(idx, model)
+
+    def extend(self, models):
+        if isinstance(models, LazyResources):
+            self._records.extend(models._records)
+            self._models.extend(models._models)
+            self._contexts.extend(models._contexts)
+        else:
+            for model in models:
+                self.append(model)
+
+    @property
+    def materialized(self):
+        """Number of records that models have been built for."""
+        return sum(1 for model in self._models if model is not None)
+
+    def iter_raw(self):
+        """Yields the JSON-API record of every resource without building models."""
+        for record, model in zip(self._records, self._models):
+            yield record if record is not None else resource_record(model)
+
+def raw_records(resources):
+    """Yields JSON-API records for a list of resources or LazyResources."""
+    if isinstance(resources, LazyResources):
+        return resources.iter_raw()
+    return (resource_record(resource) for resource in resources)
+
 class ResourceCollection(object):
     def __init__(self, client, meta, type_, resources):
         self.client = client
         self.type_ = type_
         self.resources = resources
         self.meta = meta
+        # Query params (include, fieldsets, filters) carried over to following pages.
+        self.query = {}
+
+    def next_page_params(self, url):
+        """Returns the carried query parameters that a next-page link is missing."""
+        present = parse_qs(urlsplit(url).query)
+        return {k: v for k, v in self.query.items() if k not in present}
+
+    def _get_page(self, url, lazy=None):
+        return self.client._get_page(url, self.next_page_params(url), lazy=lazy)
 
     def load_next_page(self):
         if self.meta.get('next'):
-            col = self.client.get_url(self.meta['next'])
+            col = self._get_page(self.meta['next'])
             if isinstance(col, ResourceCollection):
                 self.resources.extend(col.resources)
                 self.meta = col.meta
@@ -97,6 +382,10 @@ class ResourceCollection(object):
         return len(self.resources)
 
     def __iter__(self):
+        depth = getattr(self.client, 'read_ahead_pages', 0)
+        if depth:
+            yield from self.read_ahead(depth)
+            return
         current_index = 0
         while True:
             if current_index < len(self.resources):
@@ -109,6 +398,127 @@ class ResourceCollection(object):
             else:
                 break
 
+    def _fetch_pages_ahead(self, url, pages, stop):
+        """Fetches the pages following url into the pages queue until stopped."""
+        while url and not stop.is_set():
+            try:
+                col = self._get_page(url)
+                if not isinstance(col, ResourceCollection):
+                    logging.warning(f"Expected ResourceCollection from next page, got {type(col)}")
+                    col = None
+            except Exception as e:
+                col = e
+            while not stop.is_set():
+                try:
+                    pages.put(col, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            url = col.meta.get('next') if isinstance(col, ResourceCollection) else None
+
+    def read_ahead(self, depth=1):
+        """
+        Yields all resources while up to `depth` following pages are fetched
+        in a background thread, so the next page is usually already loaded
+        by the time the current one has been consumed.
+        """
+        if depth < 1:
+            raise ValueError("Read-ahead depth must be at least 1.")
+        pages = queue.Queue(maxsize=depth)
+        stop = threading.Event()
+        if self.meta.get('next'):
+            threading.Thread(target=self._fetch_pages_ahead,
+                             args=(self.meta['next'], pages, stop),
+                             daemon=True).start()
+        current_index = 0
+        try:
+            while True:
+                if current_index < len(self.resources):
+                    yield self.resources[current_index]
+                    current_index += 1
+                elif self.meta.get('next'):
+                    col = pages.get()
+                    if isinstance(col, Exception):
+                        raise col
+                    if col is None:
+                        self.meta['next'] = None
+                        break
+                    self.resources.extend(col.resources)
+                    self.meta = col.meta
+                else:
+                    break
+        finally:
+            stop.set()
+
+    def stream(self, read_ahead=0):
+        """
+        Yields all resources page by page without keeping consumed pages.
+
+        Unlike iterating over the collection, following pages are not added
+        to `resources`, so memory stays bounded by a few pages regardless of
+        the collection size. Pass `read_ahead` to fetch that many pages in a
+        background thread.
+        """
+        url = self.meta.get('next')
+        pages = queue.Queue(maxsize=read_ahead) if read_ahead else None
+        stop = threading.Event()
+        if url and pages is not None:
+            threading.Thread(target=self._fetch_pages_ahead,
+                             args=(url, pages, stop),
+                             daemon=True).start()
+        try:
+            yield from self.resources
+            while url:
+                if pages is None:
+                    col = self._get_page(url)
+                    if not isinstance(col, ResourceCollection):
+                        logging.warning(f"Expected ResourceCollection from next page, got {type(col)}")
+                        col = None
+                else:
+                    col = pages.get()
+                    if isinstance(col, Exception):
+                        raise col
+                if col is None:
+                    break
+                url = col.meta.get('next')
+                resources, col = col.resources, None
+                yield from resources
+        finally:
+            stop.set()
+
+    def iter_raw(self):
+        """
+        Yields the raw JSON-API record (id, type, attributes, ...) of every
+        resource page by page, without building models for records that
+        have not been accessed yet. Like stream, following pages are not
+        kept in `resources`.
+        """
+        yield from raw_records(self.resources)
+        url = self.meta.get('next')
+        while url:
+            col = self._get_page(url, lazy=True)
+            if not isinstance(col, ResourceCollection):
+                logging.warning(f"Expected ResourceCollection from next page, got {type(col)}")
+                break
+            url = col.meta.get('next')
+            yield from raw_records(col.resources)
+
+    def to_columns(self, fields=None):
+        """
+        Returns the attributes of all resources as columns, {'id': [...],
+        field: [...]}, collected from the raw records while streaming pages.
+        """
+        return records_to_columns(self.iter_raw(), fields)
+
+    def to_numpy(self, fields=None, dtypes=None):
+        """
+        Returns the attributes of all resources as typed NumPy arrays:
+        float64 for decimals (NaN where missing), int64 for integers, bool,
+        datetime64[ms] (UTC) for timestamps and object otherwise. dtypes
+        overrides the inferred type of a field. Requires NumPy.
+        """
+        return columns_to_numpy(self.to_columns(fields), dtypes)
+
     def all(self):
         """Yields all resources, loading next pages as needed."""
         for resource in self:
@@ -120,14 +530,48 @@ class ResourceCollection(object):
         return self
 
 class Resource(object):
+    # Mapper subclasses that do not declare __slots__ get a __dict__ as usual.
+    __slots__ = ('client', 'id_', 'type_', 'deleted', 'attributes', 'relationships',
+                 'loaded_fields', '__weakref__')
+    relationship_class = Relationship
+
     def __init__(self, client, id_, type_, attributes, relationships):
         self.client = client
         self.id_ = id_
         self.type_ = type_
-        self.attributes = attributes
-        self.relationships = {rel: Relationship(rel, self.client, data)
-                              for rel, data in relationships.items()}
         self.deleted = False
+        # Attribute names loaded through a sparse fieldset, or None if the
+        # resource was loaded in full.
+        self.loaded_fields = None
+        self.refresh(attributes, relationships)
+
+    def refresh(self, attributes, relationships, loaded_fields=None):
+        """
+        Replaces attributes and relationships with newly loaded data. Data
+        loaded through a sparse fieldset (loaded_fields) is merged into what
+        was loaded before instead of replacing it.
+        """
+        if loaded_fields is not None:
+            attributes = dict(self.attributes, **attributes)
+            relationships = self.relationships.merged(relationships)
+            if self.loaded_fields is not None:
+                loaded_fields = self.loaded_fields | loaded_fields
+            else:
+                loaded_fields = None
+        else:
+            relationships = Relationships(self.client, self.relationship_class, relationships)
+        self.attributes = attributes
+        self.relationships = relationships
+        self.loaded_fields = loaded_fields
+
+    @property
+    def is_partial(self):
+        """True if only a sparse fieldset of the attributes has been loaded."""
+        return self.loaded_fields is not None
+
+    def attach_included(self, included, fieldsets=None):
+        """Lets relationships resolve locally from a compound document's records."""
+        self.relationships.attach_included(included, fieldsets)
 
     def __eq__(self, other):
         if not isinstance(other, Resource):
@@ -138,9 +582,12 @@ class Resource(object):
         return {"id": self.id_, "type": self.type_}
 
     def get_self(self):
+        if self.client.identity_map is not None:
+            self.client.identity_map.expire(self.type_, self.id_)
         resp = self.client.get(self.type_, id=self.id_)
         self.attributes = resp.attributes
         self.relationships = resp.relationships
+        self.loaded_fields = resp.loaded_fields
         return self
 
     def get_rel(self, rel, **params):
@@ -154,6 +601,7 @@ class Resource(object):
         )
         self.attributes = resp.attributes
         self.relationships = resp.relationships
+        self.loaded_fields = resp.loaded_fields
         return self
 
     def delete(self):
@@ -180,6 +628,8 @@ class Resource(object):
 
 
 class Client(object):
+    collection_class = ResourceCollection
+
     def __init__(self,
                  client_id=None,
                  client_secret=None,
@@ -196,7 +646,30 @@ class Client(object):
                  auth_code=None,  # For OAuth 2.0 'authorization_code' grant (initial code)
                  refresh_token_initial=None,  # If starting with a known refresh token
                  fallback_to_legacy_auth=True,  # Allow fallback to OAuth 1.0 on initial auth failure
-                 user_agent=None  # Custom user-agent string for the project
+                 user_agent=None,  # Custom user-agent string for the project
+                 session=None,  # Optional pre-configured requests.Session to share
+                 pool_connections=10,  # Number of host pools kept by the adapter
+                 pool_maxsize=10,  # Max keep-alive connections per host pool
+                 pool_block=False,  # Block instead of opening extra connections when the pool is full
+                 keep_alive=True,  # Reuse connections between requests
+                 idle_timeout=None,  # Seconds after which idle pooled connections are dropped
+                 read_ahead_pages=0,  # Pages fetched in the background while iterating collections
+                 cache=None,  # Optional ResponseCache for GET requests
+                 identity_map=None,  # Optional IdentityMap sharing one Resource per (type, id)
+                 state_store=None,  # Optional StateStore persisting root links and tokens
+                 refresh_ahead=None,  # Renew tokens in the background at this fraction of their lifetime
+                 on_token_refresh=None,  # Callable or list of callables run with the client after each new token
+                 rate_limiter=None,  # RateLimiter, or max requests per second, applied to API requests
+                 share_rate_limiter=False,  # Share the limiter with other clients using the same credentials
+                 max_concurrency=None,  # Max API requests this client has in flight at once
+                 retry=True,  # RetryPolicy for transient failures; True for the default policy, None to disable
+                 timeout=30.0,  # Seconds each request attempt may take, capped by the retry deadline; None for no limit
+                 coalesce=True,  # Share one HTTP call between concurrent identical GETs; or a RequestCoalescer
+                 codec=None,  # JSON codec or codec name ('orjson', 'ujson', 'json'); None picks the fastest installed
+                 lazy_models=False,  # Build collection models on first access instead of up front
+                 before_request=None,  # Callable or list of callables run with a RequestInfo before each API request
+                 after_request=None,  # Callable or list of callables run with the completed RequestInfo
+                 metrics=None  # Optional MetricsRegistry recording this client's requests
                  ):
         self.client_id = client_id
         self.client_secret = client_secret
@@ -221,10 +694,177 @@ class Client(object):
         self.token_type = 'Bearer'
         self.expires_at = None
         self.granted_scope = None
+        self.token_lifetime = None
+        self.token_obtained_at = None
 
         self.api_root_resp = None
         self.fallback_to_legacy_auth = fallback_to_legacy_auth
 
+        # Connection pooling
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self.pool_maxsize = pool_maxsize
+        self._owns_session = session is None
+        self.session = session if session is not None else \
+            self._build_session(pool_connections, pool_maxsize, pool_block)
+        self._last_used = None
+
+        # Single-flight guards for sharing one client between threads
+        self._auth_lock = threading.RLock()
+        self._root_lock = threading.Lock()
+
+        # Proactive token renewal
+        self.refresh_ahead = refresh_ahead
+        self.on_token_refresh = self._hook_list(on_token_refresh)
+        self._refresher_stop = None
+
+        self.read_ahead_pages = read_ahead_pages
+        self.cache = cache
+        self.identity_map = identity_map
+        self.state_store = state_store
+
+        if isinstance(rate_limiter, (int, float)):
+            if share_rate_limiter:
+                rate_limiter = RateLimiter.shared(self._state_key(), rate=rate_limiter)
+            else:
+                rate_limiter = RateLimiter(rate=rate_limiter)
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        self._concurrency = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self.retry = RetryPolicy() if retry is True else (retry or None)
+        self.timeout = timeout
+        self.coalescer = RequestCoalescer() if coalesce is True else (coalesce or None)
+        self.codec = get_codec(codec)
+        self.lazy_models = lazy_models
+
+        # Instrumentation
+        self.before_request = self._hook_list(before_request)
+        self.after_request = self._hook_list(after_request)
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.attach(self)
+
+        if refresh_ahead is not None:
+            self.start_token_refresher()
+
+    @staticmethod
+    def _hook_list(hooks):
+        if hooks is None:
+            return []
+        if callable(hooks):
+            return [hooks]
+        return list(hooks)
+
+    @staticmethod
+    def _build_session(pool_connections, pool_maxsize, pool_block):
+        """Creates a session whose adapters keep a pool of keep-alive connections."""
+        session = requests.Session()
+        for prefix in ('https://', 'http://'):
+            session.mount(prefix, HTTPAdapter(pool_connections=pool_connections,
+                                              pool_maxsize=pool_maxsize,
+                                              pool_block=pool_block))
+        return session
+
+    def reap_idle_connections(self):
+        """Drops pooled connections if they have been idle longer than idle_timeout."""
+        if self.idle_timeout is None or self._last_used is None:
+            return False
+        if time.monotonic() - self._last_used < self.idle_timeout:
+            return False
+        for adapter in self.session.adapters.values():
+            adapter.poolmanager.clear()
+        logging.info("Dropped idle pooled connections.")
+        return True
+
+    def _send(self, method, url, **kwargs):
+        """Sends an HTTP request through the client's pooled session."""
+        self.reap_idle_connections()
+        if not self.keep_alive:
+            headers = dict(kwargs.pop('headers', None) or {})
+            headers['Connection'] = 'close'
+            kwargs['headers'] = headers
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            self._last_used = time.monotonic()
+
+    def close(self):
+        """Closes pooled connections. Sessions passed in by the caller are left open."""
+        self.stop_token_refresher()
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _state_key(self):
+        """Identifies this client's credentials in the state store."""
+        return f"{self.api_root}|{self.client_id}|{self.username or ''}"
+
+    def save_state(self, tokens=True, links=True):
+        """
+        Persists tokens and/or API root links to the state store, keeping
+        whatever else is stored for this client.
+        """
+        if self.state_store is None:
+            return
+        key = self._state_key()
+        try:
+            with self.state_store.lock():
+                state = dict(self.state_store.load(key) or {})
+                if links:
+                    state['api_root_links'] = self.api_root_resp
+                if tokens:
+                    state.update({
+                        'access_token': self.access_token,
+                        'refresh_token': self.refresh_token,
+                        'token_type': self.token_type,
+                        'expires_at': self.expires_at,
+                        'granted_scope': self.granted_scope,
+                        'token_lifetime': self.token_lifetime,
+                        'token_obtained_at': self.token_obtained_at,
+                    })
+                self.state_store.save(key, state)
+        except OSError as e:
+            logging.warning(f"Failed to save client state: {e}")
+
+    def load_state(self):
+        """
+        Restores API root links and tokens from the state store.
+
+        Returns True if the restored state lets the client make requests
+        without any network round trip. An expired access token is still
+        restored so that it gets refreshed with the stored refresh token.
+        """
+        if self.state_store is None:
+            return False
+        try:
+            state = self.state_store.load(self._state_key())
+        except OSError as e:
+            logging.warning(f"Failed to load client state: {e}")
+            return False
+        if not state:
+            return False
+        if state.get('api_root_links') and self.api_root_resp is None:
+            self.api_root_resp = state['api_root_links']
+        if state.get('access_token'):
+            self._set_token_state(state)
+        return token_is_valid(state) and self.api_root_resp is not None
+
+    def _set_token_state(self, state):
+        self.access_token = state['access_token']
+        self.token_type = state.get('token_type') or 'Bearer'
+        self.expires_at = state.get('expires_at')
+        self.granted_scope = state.get('granted_scope')
+        self.refresh_token = state.get('refresh_token') or self.refresh_token
+        self.token_lifetime = state.get('token_lifetime')
+        self.token_obtained_at = state.get('token_obtained_at')
+
     @property
     def token(self):
         """Backward compatibility property for accessing the token."""
@@ -237,8 +877,9 @@ class Client(object):
     def _process_token_response(self, resp):
         """Processes the JSON response from a token request."""
         try:
-            resp.raise_for_status()
-            data = resp.json()
+            if resp.status_code >= 400:
+                raise AuthenticationError(resp, self.codec)
+            data = self.codec.decode(resp)
 
             if 'access_token' not in data:
                 raise AuthenticationError(resp) 
@@ -250,62 +891,72 @@ class Client(object):
             if 'refresh_token' in data:
                 self.refresh_token = data['refresh_token']
 
-            expires_in = data.get('expires_in')
-            if expires_in:
-                buffer = 30
-                self.expires_at = time.time() + int(expires_in) - buffer
-            else:
-                self.expires_at = None
-
+            self._set_token_expiry(data.get('expires_in'))
+            self._token_obtained()
             return resp.status_code
 
-        except requests.exceptions.RequestException as e:
-            new_exc = AuthenticationError(e.response if e.response is not None else resp)
-            new_exc.__cause__ = e
-            raise new_exc
         except ValueError as e:
              new_exc = AuthenticationError(resp)
              new_exc.__cause__ = e
              raise new_exc
 
-    def _auth_legacy(self):
-        """Authenticate using the original /oauth/token endpoint."""
-        token_url = self.create_url("/oauth/token")
-        payload = dict(
+    def _set_token_expiry(self, expires_in):
+        """Records when the current token was obtained and when it expires."""
+        self.token_obtained_at = time.time()
+        if expires_in:
+            buffer = 30
+            self.token_lifetime = int(expires_in)
+            self.expires_at = self.token_obtained_at + int(expires_in) - buffer
+        else:
+            self.token_lifetime = None
+            self.expires_at = None
+
+    def _token_obtained(self):
+        """Saves a newly obtained token and notifies on_token_refresh hooks."""
+        self.save_state(links=False)
+        for hook in self.on_token_refresh:
+            try:
+                hook(self)
+            except Exception as e:
+                logging.warning(f"Token refresh hook {hook!r} failed: {e}")
+
+    def _legacy_payload(self):
+        """Builds the form payload for the original /oauth/token endpoint."""
+        return dict(
             client_id=self.client_id,
             client_secret=self.client_secret,
             grant_type="client_credentials"
         )
-        logging.info("Attempting Legacy Authentication...")
-        resp = requests.post(token_url, data=payload)
+
+    def _process_legacy_token_response(self, resp):
+        """Processes the JSON response from a legacy token request."""
         try:
-            resp.raise_for_status()
-            data = resp.json()
+            if resp.status_code >= 400:
+                raise AuthenticationError(resp, self.codec)
+            data = self.codec.decode(resp)
             self.access_token = data.get('access_token')
             self.token_type = 'Bearer'
-            expires_in = data.get('expires_in')
-            if expires_in:
-                buffer = 30
-                self.expires_at = time.time() + int(expires_in) - buffer
-            else:
-                 self.expires_at = None
+            self._set_token_expiry(data.get('expires_in'))
             if not self.access_token:
                 raise AuthenticationError(resp)
+            self._token_obtained()
             logging.info("Legacy Authentication Successful.")
             return resp.status_code
-        except requests.exceptions.RequestException as e:
-            new_exc = AuthenticationError(e.response if e.response is not None else resp)
-            new_exc.__cause__ = e
-            raise new_exc
         except ValueError as e:
             new_exc = AuthenticationError(resp)
             new_exc.__cause__ = e
             raise new_exc
 
-    def _auth_oauth2(self, grant_type_override=None):
-        """Authenticate using OAuth 2.0 /oauth2/token endpoint."""
-        token_url = self.create_url("/oauth2/token")
-        current_grant_type = grant_type_override or self.grant_type
+    def _auth_legacy(self):
+        """Authenticate using the original /oauth/token endpoint."""
+        token_url = self.create_url("/oauth/token")
+        payload = self._legacy_payload()
+        logging.info("Attempting Legacy Authentication...")
+        resp = self._send('POST', token_url, data=payload)
+        return self._process_legacy_token_response(resp)
+
+    def _oauth2_payload(self, current_grant_type):
+        """Builds the form payload for an OAuth 2.0 token request."""
         payload = {
             'client_id': self.client_id,
             'client_secret': self.client_secret,
@@ -314,8 +965,6 @@ class Client(object):
         if self.scope:
             payload['scope'] = self.scope
 
-        logging.info(f"Attempting OAuth 2.0 Authentication (grant_type: {current_grant_type})...")
-
         if current_grant_type == 'client_credentials':
             pass
         elif current_grant_type == 'password':
@@ -334,8 +983,16 @@ class Client(object):
             payload['refresh_token'] = self.refresh_token
         else:
             raise ValueError(f"Unsupported grant_type: {current_grant_type}")
+        return payload
 
-        resp = requests.post(token_url, data=payload)
+    def _auth_oauth2(self, grant_type_override=None):
+        """Authenticate using OAuth 2.0 /oauth2/token endpoint."""
+        token_url = self.create_url("/oauth2/token")
+        current_grant_type = grant_type_override or self.grant_type
+        logging.info(f"Attempting OAuth 2.0 Authentication (grant_type: {current_grant_type})...")
+        payload = self._oauth2_payload(current_grant_type)
+
+        resp = self._send('POST', token_url, data=payload)
         status_code = self._process_token_response(resp)
         logging.info(f"OAuth 2.0 Authentication ({current_grant_type}) Successful.")
         if current_grant_type == 'authorization_code':
@@ -365,6 +1022,15 @@ class Client(object):
 
     def refresh_oauth2_token(self):
         """Refresh the OAuth 2.0 token using the refresh token."""
+        with self._auth_lock:
+            if self.state_store is not None:
+                with self.state_store.lock():
+                    # Another process may have rotated the refresh token.
+                    self.adopt_stored_token()
+                    return self._refresh_oauth2_token()
+            return self._refresh_oauth2_token()
+
+    def _refresh_oauth2_token(self):
         if not self.refresh_token:
             logging.error("No refresh token available. Cannot refresh.")
             raise AuthenticationError("Refresh token missing, cannot refresh.")
@@ -379,13 +1045,124 @@ class Client(object):
             self.expires_at = None
             raise e
 
+    def adopt_stored_token(self):
+        """
+        Takes over the tokens in the state store if another client has
+        renewed them since this client last saw them. Returns True if the
+        stored tokens were adopted.
+        """
+        if self.state_store is None:
+            return False
+        try:
+            state = self.state_store.load(self._state_key())
+        except OSError as e:
+            logging.warning(f"Failed to load client state: {e}")
+            return False
+        if not state or not state.get('access_token') or \
+                state['access_token'] == self.access_token:
+            return False
+        self._set_token_state(state)
+        logging.info("Adopted access token renewed by another client.")
+        return True
+
+    def _token_needs_renewal(self):
+        return self.access_token is None or \
+            (self.expires_at is not None and time.time() >= self.expires_at)
+
     def _ensure_valid_token(self):
         """Checks if token exists and is valid, refreshes if needed."""
+        if not self._token_needs_renewal():
+            return
+        with self._auth_lock:
+            # Only one thread renews; the others wait here and reuse its token.
+            if not self._token_needs_renewal():
+                return
+            if self.access_token is not None:
+                logging.warning("Access token expired.")
+            if self.state_store is None:
+                return self._renew_token()
+            with self.state_store.lock():
+                # Likewise, only one process renews a shared token.
+                self.adopt_stored_token()
+                if self._token_needs_renewal():
+                    self._renew_token()
+
+    def _refresh_ahead_delay(self):
+        """Seconds until the token is due for proactive renewal, or None if unknown."""
+        if self.access_token is None or not self.token_lifetime or \
+                self.token_obtained_at is None:
+            return None
+        return self.token_obtained_at + self.refresh_ahead * self.token_lifetime - time.time()
+
+    def _refresh_ahead_if_due(self):
+        with self._auth_lock:
+            if self.state_store is not None:
+                with self.state_store.lock():
+                    self.adopt_stored_token()
+                    delay = self._refresh_ahead_delay()
+                    if delay is not None and delay <= 0:
+                        logging.info("Renewing access token ahead of expiry.")
+                        self._renew_ahead()
+                return
+            delay = self._refresh_ahead_delay()
+            if delay is not None and delay <= 0:
+                logging.info("Renewing access token ahead of expiry.")
+                self._renew_ahead()
+
+    def _renew_ahead(self):
+        """
+        Renews a still valid token. Unlike _renew_token, a failure keeps the
+        current tokens and does not fall back to full authentication, so
+        requests go on using the valid token; the refresher retries later.
+        """
+        if self.oauth_version == 2 and self.refresh_token:
+            return self._auth_oauth2(grant_type_override='refresh_token')
+        return self.authenticate()
+
+    def _run_token_refresher(self, stop):
+        while True:
+            delay = self._refresh_ahead_delay()
+            if delay is None or delay > 0:
+                # Re-check at least every few seconds in case another thread
+                # or process obtained a new token in the meantime.
+                if stop.wait(min(delay, 5.0) if delay is not None else 1.0):
+                    return
+                continue
+            try:
+                self._refresh_ahead_if_due()
+            except (ApiError, requests.exceptions.RequestException) as e:
+                logging.warning(f"Background token renewal failed: {e}")
+                if stop.wait(5.0):
+                    return
+
+    def start_token_refresher(self, refresh_ahead=None):
+        """
+        Starts a background thread that renews the token once `refresh_ahead`
+        (a fraction between 0 and 1) of its lifetime has passed, so requests
+        do not have to wait for a renewal.
+        """
+        if refresh_ahead is not None:
+            self.refresh_ahead = refresh_ahead
+        if not self.refresh_ahead or not 0 < self.refresh_ahead < 1:
+            raise ValueError("refresh_ahead must be a fraction between 0 and 1.")
+        if self._refresher_stop is not None:
+            return
+        self._refresher_stop = threading.Event()
+        threading.Thread(target=self._run_token_refresher,
+                         args=(self._refresher_stop,),
+                         daemon=True).start()
+
+    def stop_token_refresher(self):
+        """Stops the background token refresher, if running."""
+        if self._refresher_stop is not None:
+            self._refresher_stop.set()
+            self._refresher_stop = None
+
+    def _renew_token(self):
         if self.access_token is None:
             logging.info("No access token found. Authenticating...")
             self.authenticate()
-        elif self.expires_at is not None and time.time() >= self.expires_at:
-            logging.warning("Access token expired.")
+        else:
             if self.oauth_version == 2 and self.refresh_token:
                 try:
                     self.refresh_oauth2_token()
@@ -410,11 +1187,13 @@ class Client(object):
         url = self.create_url("/api/")
         resp = None
         try:
-            resp = requests.get(url, headers=DEFAULT_CLIENT_HEADERS)
+            resp = self._send('GET', url, headers=DEFAULT_CLIENT_HEADERS)
             resp.raise_for_status()
-            self.api_root_resp = resp.json().get('links')
+            self.api_root_resp = self.codec.decode(resp).get('links')
             if not self.api_root_resp:
                  logging.warning(f"No 'links' found in API root response from {url}")
+            else:
+                self.save_state(tokens=False)
             return resp.status_code
         except requests.exceptions.RequestException as e:
              logging.error(f"Error fetching API root {url}: {e}")
@@ -422,14 +1201,27 @@ class Client(object):
         except ValueError:
              raise ApiError(resp if resp is not None else None)
 
+    def revalidate_api_root(self):
+        """Refetches the API root links, logging instead of raising on failure."""
+        try:
+            self.api_root_response()
+        except ApiError as e:
+            logging.warning(f"Failed to revalidate API root links: {e}")
+
     def _fetch_api_root_if_not(self):
         """Ensures API root links are fetched."""
         if self.api_root_resp is None:
-            return self.api_root_response()
+            with self._root_lock:
+                if self.api_root_resp is None:
+                    return self.api_root_response()
 
     def resource_url(self, resource_type, id=None):
         """Constructs URL for a resource type, using cached root links."""
         self._fetch_api_root_if_not()
+        return self._resource_url_from_root(resource_type, id)
+
+    def _resource_url_from_root(self, resource_type, id=None):
+        """Constructs URL for a resource type from already fetched root links."""
         if self.api_root_resp is None:
              raise RuntimeError("API root links could not be fetched. Cannot construct resource URL.")
         if resource_type not in self.api_root_resp:
@@ -446,8 +1238,36 @@ class Client(object):
              full_url = full_url.rstrip('/')+'/'+str(id)
         return full_url
 
-    def _make_request(self, method, url, headers=None, params=None, json_data=None):
+    def _make_request(self, method, url, headers=None, params=None, json_data=None, lazy=None):
         """Internal helper to make authenticated requests."""
+        if method == 'GET' and self.coalescer is not None:
+            key = self.coalescer.key(url, params, headers, self._cache_identity())
+            document = self.coalescer.run(
+                key, lambda: self._request_document(method, url, headers, params, json_data))
+        else:
+            document = self._request_document(method, url, headers, params, json_data)
+        result = self._models_from_document(document, requested_fieldsets(params), lazy)
+        return self._carry_query(result, params)
+
+    def _request_document(self, method, url, headers=None, params=None, json_data=None):
+        """Sends an authenticated request and returns its decoded response document."""
+        if not self.before_request and not self.after_request:
+            return self._fetch_document(method, url, headers, params, json_data)
+        info = RequestInfo(method, url)
+        run_hooks(self.before_request, info)
+        started = time.perf_counter()
+        try:
+            return self._fetch_document(method, url, headers, params, json_data, info)
+        except ApiError as e:
+            info.error = e
+            info.retries = e.retries
+            raise
+        finally:
+            info.latency = time.perf_counter() - started
+            run_hooks(self.after_request, info)
+
+    def _fetch_document(self, method, url, headers=None, params=None, json_data=None, info=None):
+        """Does the work of _request_document, recording its outcome in info if given."""
         self._ensure_valid_token()
         self._fetch_api_root_if_not()
 
@@ -458,28 +1278,172 @@ class Client(object):
         if headers:
             request_headers.update(headers)
 
-        try:
-            resp = requests.request(
-                method=method,
-                url=url,
-                headers=request_headers,
-                params=params,
-                json=json_data
-            )
-            return self.handle_resp(resp)
-        except requests.exceptions.RequestException as e:
-            raise ApiError(e.response if e.response is not None else None) from e
+        cache_key, cache_entry = self._cache_lookup(method, url, params, request_headers)
+        if cache_entry is not None and self.cache.is_fresh(cache_entry):
+            if info is not None:
+                info.cached = True
+            return cache_entry.document()
 
-    def get(self, resource_type, id=None, params=None):
+        body = self.codec.dumps(json_data) if json_data is not None else None
+        started = time.monotonic()
+        retries = 0
+        delay = 0.0
+        while True:
+            try:
+                resp = self._send_throttled(method, url, request_headers, params, body,
+                                            started)
+            except requests.exceptions.RequestException as e:
+                delay = self._retry_delay(method, retries, started, delay, error=e,
+                                          sent=not connection_never_established(e))
+                if delay is None:
+                    error = ApiError(e.response if e.response is not None else None)
+                    error.retries = retries
+                    raise error from e
+            else:
+                delay = self._retry_delay(method, retries, started, delay, resp=resp)
+                if delay is None:
+                    break
+            retries += 1
+            logging.warning(f"Retrying {method} {url} in {delay:.2f}s (retry {retries}).")
+            time.sleep(delay)
+
+        if info is not None:
+            info.record_response(resp, body, retries)
+        try:
+            return self._cacheable_document(resp, method, url, cache_key, cache_entry)
+        except ApiError as e:
+            e.retries = retries
+            raise
+
+    def _models_from_document(self, document, fieldsets=None, lazy=None):
+        """Creates models from a response document; other responses are returned as is."""
+        if isinstance(document, dict):
+            return self.handle_body(document, fieldsets, lazy)
+        return document
+
+    @staticmethod
+    def _carry_query(result, params):
+        """Remembers a collection's query params (include, fields, filters) for its next pages."""
+        if isinstance(result, ResourceCollection) and params:
+            result.query = dict(params)
+        return result
+
+    def _attempt_timeout(self, started):
+        """
+        Returns the timeout for one request attempt: the client's timeout,
+        capped by the time left before the retry policy's deadline.
+        """
+        deadline = self.retry.deadline if self.retry is not None else None
+        if deadline is None or started is None:
+            return self.timeout
+        remaining = max(0.01, deadline - (time.monotonic() - started))
+        return remaining if self.timeout is None else min(self.timeout, remaining)
+
+    def _send_throttled(self, method, url, request_headers, params, body, started=None):
+        """Sends a request, pacing it with the rate limiter and resending throttled attempts."""
+        throttled = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            if self._concurrency is not None:
+                self._concurrency.acquire()
+            try:
+                resp = self._send(
+                    method=method,
+                    url=url,
+                    headers=request_headers,
+                    params=params,
+                    data=body,
+                    timeout=self._attempt_timeout(started)
+                )
+            finally:
+                if self._concurrency is not None:
+                    self._concurrency.release()
+            if not self._should_retry_throttled(resp, throttled):
+                return resp
+            throttled += 1
+
+    def _retry_delay(self, method, retries, started, previous, resp=None, error=None, sent=True):
+        """Asks the retry policy how long to wait before retrying, or None to stop."""
+        if self.retry is None:
+            return None
+        if resp is not None:
+            return self.retry.next_delay(
+                method, retries, started, previous, status=resp.status_code,
+                retry_after=parse_retry_after(resp.headers.get('Retry-After')))
+        return self.retry.next_delay(method, retries, started, previous,
+                                     error=error, sent=sent)
+
+    def _should_retry_throttled(self, resp, throttled):
+        """Feeds a response to the rate limiter; True if it was throttled and should be resent."""
+        if self.rate_limiter is None:
+            return False
+        self.rate_limiter.on_response(resp.status_code, resp.headers)
+        if resp.status_code != 429 or throttled >= self.rate_limiter.max_retries:
+            return False
+        logging.warning(f"Request throttled by the API (HTTP 429). Retrying...")
+        return True
+
+    def _cache_identity(self):
+        """Identifies the credentials a cached response was fetched with."""
+        return (self.api_root, self.client_id, self.username, self.admin)
+
+    def _cache_lookup(self, method, url, params, request_headers):
+        """Finds a cached GET response and adds its validators to the request headers."""
+        if self.cache is None or method != 'GET':
+            return None, None
+        key = ResponseCache.key(url, params, self._cache_identity())
+        entry = self.cache.get(key)
+        if entry is not None:
+            request_headers.update(entry.validators())
+        return key, entry
+
+    def _cacheable_document(self, resp, method, url, cache_key, cache_entry):
+        """Decodes a response, answering 304s from and storing GET documents in the cache."""
+        if self.cache is None:
+            return self.response_document(resp)
+        if method != 'GET':
+            self.cache.invalidate(url)
+            return self.response_document(resp)
+        if resp.status_code == 304 and cache_entry is not None:
+            self.cache.revalidated(cache_entry)
+            return cache_entry.document()
+        if resp.status_code == 200 and resp.content:
+            try:
+                body = self.codec.decode(resp)
+            except ValueError:
+                return self.response_document(resp)
+            entry = self.cache.store(cache_key, url, body, resp.headers)
+            return entry.document() if entry is not None else body
+        return self.response_document(resp)
+
+    def _identity_map_hit(self, resource_type, id, params):
+        """Returns a fresh resource from the identity map for a plain get by id."""
+        if self.identity_map is None or id is None or params:
+            return None
+        resource = self.identity_map.fresh(resource_type, id)
+        if resource is not None and resource.is_partial:
+            return None
+        return resource
+
+    def get(self, resource_type, id=None, params=None, include=None, fields=None):
+        params = query_params(params, include, fields)
+        resource = self._identity_map_hit(resource_type, id, params)
+        if resource is not None:
+            return resource
         full_url = self.resource_url(resource_type, id)
         return self._make_request('GET', full_url, params=params)
 
     def get_url(self, url, **params):
+        return self._get_page(url, params)
+
+    def _get_page(self, url, params=None, lazy=None):
+        """GETs a URL, optionally overriding lazy_models for a collection response."""
         if not url.startswith(self.api_root):
             full_url = self.create_url(url)
         else:
             full_url = url
-        return self._make_request('GET', full_url, params=params)
+        return self._make_request('GET', full_url, params=query_params(params), lazy=lazy)
 
     def to_relationship_dict(self, relationships):
         """Formats relationships for API requests."""
@@ -507,7 +1471,10 @@ class Client(object):
 
     def delete(self, resource_type, id):
         full_url = self.resource_url(resource_type, id)
-        return self._make_request('DELETE', full_url)
+        resp = self._make_request('DELETE', full_url)
+        if self.identity_map is not None:
+            self.identity_map.discard(resource_type, id)
+        return resp
 
     def delete_url(self, url, data=None):
         if not url.startswith(self.api_root):
@@ -534,20 +1501,153 @@ class Client(object):
            full_url = url
         return self._make_request('POST', full_url, params=params, json_data=data)
 
+    def _prepare_bulk(self):
+        """Authenticates and discovers the API root once before fanning out."""
+        self._ensure_valid_token()
+        self._fetch_api_root_if_not()
+
+    def bulk_update(self, items, max_workers=None):
+        """
+        Updates many resources concurrently.
+
+        Each item is a (resource_type, id, attributes[, relationships]) tuple
+        or a dict of update() keyword arguments. Failures are reported per
+        item in the returned BulkResult instead of aborting the batch.
+        """
+        self._prepare_bulk()
+        return run_bulk(self.update, items, max_workers or self.pool_maxsize)
+
+    def bulk_create(self, items, max_workers=None):
+        """
+        Creates many resources concurrently.
+
+        Each item is a (resource_type, attributes[, relationships]) tuple or
+        a dict of create() keyword arguments.
+        """
+        self._prepare_bulk()
+        return run_bulk(self.create, items, max_workers or self.pool_maxsize)
+
+    def bulk_delete(self, items, max_workers=None):
+        """
+        Deletes many resources concurrently.
+
+        Each item is a (resource_type, id) tuple or a dict of delete()
+        keyword arguments.
+        """
+        self._prepare_bulk()
+        return run_bulk(self.delete, items, max_workers or self.pool_maxsize)
+
+    def _window_fetcher(self, url, params, timestamp_field, window_params):
+        """Returns a function fetching every page of url within a time window."""
+        window_params = window_params or (
+            lambda start, end: default_window_params(timestamp_field, start, end))
+
+        def fetch_window(start, end):
+            col = self.get_url(url, **dict(params or {}, **window_params(start, end)))
+            if col is None:
+                return []
+            return list(col.stream()) if isinstance(col, ResourceCollection) else [col]
+        return fetch_window
+
+    def get_time_range(self, url, start, end, window=timedelta(days=1), max_workers=None,
+                       timestamp_field='created-at', window_params=None, params=None):
+        """
+        Yields the resources of a time-filtered collection (e.g. a puck's
+        sensor readings) between start and end, in timestamp order.
+
+        The range is split into windows that are fetched concurrently on up
+        to max_workers threads, each paging through its own part of the
+        collection. window_params(start, end) returns the query parameters
+        filtering a window; by default filter[<timestamp_field>][gte] and
+        [lt]. Resources returned for two windows are only yielded once.
+        """
+        self._prepare_bulk()
+        fetch_window = self._window_fetcher(url, params, timestamp_field, window_params)
+        return iter_windows(fetch_window, split_windows(start, end, window),
+                            max_workers or self.pool_maxsize, timestamp_field)
+
     def create_model(self,
                      id=None,
                      type=None,
                      attributes={},
                      relationships={},
+                     loaded_fields=None,
                      **kwargs):
         """Creates a Resource or specific mapped model instance."""
         if not type:
             raise ValueError("Resource 'type' is required to create a model.")
         klass = self.mapper.get(type, self.default_model)
-        return klass(client=self, id_=id, type_=type, attributes=attributes, relationships=relationships)
+        if self.identity_map is not None and id is not None:
+            resource = self.identity_map.get(type, id)
+            if resource is not None and resource.__class__ is klass:
+                resource.refresh(attributes, relationships, loaded_fields)
+                return self.identity_map.add(resource)
+        resource = klass(client=self, id_=id, type_=type, attributes=attributes, relationships=relationships)
+        resource.loaded_fields = loaded_fields
+        if self.identity_map is not None and id is not None:
+            self.identity_map.add(resource)
+        return resource
+
+    @staticmethod
+    def index_included(body):
+        """
+        Indexes the records of a compound document by (type, id), or returns
+        None if the document has no included records.
+        """
+        if not body.get('included'):
+            return None
+        data = body.get('data')
+        records = list(body['included'])
+        records.extend(data if isinstance(data, list) else [data])
+        return {(r.get('type'), str(r.get('id'))): r
+                for r in records if isinstance(r, dict)}
+
+    def model_from_record(self, record, included=None, fieldsets=None):
+        """Creates a model from a JSON-API record of a (possibly compound) document."""
+        loaded_fields = fieldsets.get(record.get('type')) if fieldsets else None
+        model = self.create_model(loaded_fields=loaded_fields, **record)
+        if included is not None and isinstance(model, Resource):
+            model.attach_included(included, fieldsets)
+        return model
+
+    def handle_body(self, body, fieldsets=None, lazy=None):
+        """
+        Creates models from a decoded JSON-API document. fieldsets are the
+        sparse fieldsets the document was requested with, if any. With lazy
+        (by default the client's lazy_models), the models of a collection
+        are only built when accessed.
+        """
+        if 'data' not in body:
+             logging.warning(f"Response body does not contain 'data' key. Body: {body}")
+             return body
+
+        if body['data'] is None:
+            return None
+
+        response_data = body['data']
+        included = self.index_included(body)
+
+        if isinstance(response_data, list):
+            if not response_data:
+                 return self.collection_class(self, body.get('meta', {}), None, [])
+            collection_type = response_data[0].get('type')
+            if self.lazy_models if lazy is None else lazy:
+                resources = LazyResources(self, response_data, included, fieldsets)
+            else:
+                resources = [self.model_from_record(r, included, fieldsets) for r in response_data]
+            return self.collection_class(self, body.get('meta', {}), collection_type, resources)
+        elif isinstance(response_data, dict):
+            return self.model_from_record(response_data, included, fieldsets)
+        else:
+             logging.warning(f"Unexpected type for 'data' in response: {type(response_data)}")
+             return response_data
 
-    def handle_resp(self, resp):
+    def handle_resp(self, resp, fieldsets=None, lazy=None):
         """Processes the HTTP response, checks status, and creates models."""
+        return self._models_from_document(self.response_document(resp), fieldsets, lazy)
+
+    def response_document(self, resp):
+        """Checks the status of an HTTP response and returns its decoded body."""
         status_code = resp.status_code
 
         if 200 <= status_code < 300:
@@ -558,28 +1658,7 @@ class Client(object):
                      logging.warning(f"Received status {status_code} with empty body.")
                      return None
 
-                body = resp.json()
-
-                if 'data' not in body:
-                     logging.warning(f"Response body does not contain 'data' key. Body: {body}")
-                     return body
-
-                if body['data'] is None:
-                    return None
-
-                response_data = body['data']
-
-                if isinstance(response_data, list):
-                    if not response_data:
-                         return ResourceCollection(self, body.get('meta', {}), None, [])
-                    collection_type = response_data[0].get('type')
-                    resources = [self.create_model(**r) for r in response_data]
-                    return ResourceCollection(self, body.get('meta', {}), collection_type, resources)
-                elif isinstance(response_data, dict):
-                    return self.create_model(**response_data)
-                else:
-                     logging.warning(f"Unexpected type for 'data' in response: {type(response_data)}")
-                     return response_data
+                return self.codec.decode(resp)
 
             except ValueError as e:
                 raise ApiError(resp) from e
@@ -588,16 +1667,16 @@ class Client(object):
 
         elif status_code >= 400:
             if status_code in [401, 403]:
-                raise AuthenticationError(resp)
+                raise AuthenticationError(resp, self.codec)
+            elif status_code == 429:
+                raise RateLimitError(resp, self.codec)
             else:
-                raise ApiError(resp)
+                raise ApiError(resp, self.codec)
 
         else:
+            # 1xx/3xx: neither requests nor httpx responses are errors here, but
+            # httpx's raise_for_status() would raise for them, so don't use it.
             logging.warning(f"Received unexpected status code {status_code}. Response Body: {resp.text[:200]}")
-            try:
-                 resp.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                 raise ApiError(resp) from e
             return resp.text
 
 def make_client(client_id, client_secret, root="https://api.flair.co/",
@@ -605,11 +1684,22 @@ def make_client(client_id, client_secret, root="https://api.flair.co/",
                 oauth_version=2, grant_type='client_credentials', scope=None,
                 username=None, password=None, redirect_uri=None, auth_code=None,
                 refresh_token_initial=None, fallback_to_legacy_auth=True,
-                user_agent=None):
+                user_agent=None, session=None, pool_connections=10,
+                pool_maxsize=10, pool_block=False, keep_alive=True,
+                idle_timeout=None, read_ahead_pages=0, cache=None,
+                identity_map=None, state_store=None, revalidate_state=True,
+                refresh_ahead=None, on_token_refresh=None, rate_limiter=None,
+                share_rate_limiter=False, max_concurrency=None, retry=True, timeout=30.0,
+                coalesce=True, codec=None,
+                lazy_models=False, before_request=None, after_request=None, metrics=None):
     """
     Factory function to create and initialize an API client.
 
-    Handles initial authentication and API root fetching.
+    Handles initial authentication and API root fetching. With a
+    state_store, previously saved tokens and root links are reused, so a
+    client with valid saved state starts without any network call; the root
+    links are then revalidated in a background thread unless
+    revalidate_state is False.
     """
     c = Client(
        client_id=client_id,
@@ -627,13 +1717,48 @@ def make_client(client_id, client_secret, root="https://api.flair.co/",
        auth_code=auth_code,
        refresh_token_initial=refresh_token_initial,
        fallback_to_legacy_auth=fallback_to_legacy_auth,
-       user_agent=user_agent
+       user_agent=user_agent,
+       session=session,
+       pool_connections=pool_connections,
+       pool_maxsize=pool_maxsize,
+       pool_block=pool_block,
+       keep_alive=keep_alive,
+       idle_timeout=idle_timeout,
+       read_ahead_pages=read_ahead_pages,
+       cache=cache,
+       identity_map=identity_map,
+       state_store=state_store,
+       refresh_ahead=refresh_ahead,
+       on_token_refresh=on_token_refresh,
+       rate_limiter=rate_limiter,
+       share_rate_limiter=share_rate_limiter,
+       max_concurrency=max_concurrency,
+       retry=retry,
+       timeout=timeout,
+       coalesce=coalesce,
+       codec=codec,
+       lazy_models=lazy_models,
+       before_request=before_request,
+       after_request=after_request,
+       metrics=metrics
     )
-    try:
-        c.authenticate()
-    except AuthenticationError as e:
-        logging.error(f"FATAL: Client initialization failed - Could not authenticate.")
-        raise e
+    if c.load_state():
+        logging.info("Restored client state; skipping authentication and API root fetch.")
+    else:
+        try:
+            if c.access_token is None:
+                c.authenticate()
+            else:
+                c._ensure_valid_token()
+        except AuthenticationError as e:
+            logging.error(f"FATAL: Client initialization failed - Could not authenticate.")
+            c.close()
+            raise e
+
+    if c.api_root_resp is not None:
+        if revalidate_state:
+            threading.Thread(target=c.revalidate_api_root, daemon=True).start()
+        return c
 
     try:
         c.api_root_response()
@@ -0,0 +1,137 @@
+import copy
+import asyncio
+import threading
+
+from .cache import copy_document
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+        # Set when the leader was interrupted (e.g. cancelled) without a result.
+        self.abandoned = False
+
+
+class _AsyncCall(object):
+    def __init__(self):
+        self.future = asyncio.get_running_loop().create_future()
+        self.followers = 0
+
+
+class RequestCoalescer(object):
+    """
+    Lets concurrent identical GET requests share one HTTP call.
+
+    The first caller of a key sends the request; callers arriving while it
+    is in flight wait for it and receive their own copy of the decoded
+    document (or of the exception raised), so models built from it are
+    never shared between callers. Only Exceptions are shared: if the first
+    caller is interrupted (cancelled, KeyboardInterrupt), the waiting
+    callers retry and one of them sends the request. `leaders` counts
+    requests actually sent, `coalesced` those answered by another caller's
+    request.
+    """
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params, headers, identity):
+        params = tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+        headers = tuple(sorted((headers or {}).items()))
+        return (url, params, headers, identity)
+
+    def __len__(self):
+        """Number of requests currently in flight."""
+        return len(self._calls) + len(self._async_calls)
+
+    def _join(self, calls, key, factory):
+        with self._lock:
+            call = calls.get(key)
+            if call is None:
+                call = calls[key] = factory()
+                self.leaders += 1
+                return call, True
+            call.followers += 1
+            self.coalesced += 1
+            return call, False
+
+    def _finish(self, calls, key, call):
+        """Stops new callers joining call; returns True if any did."""
+        with self._lock:
+            calls.pop(key, None)
+            return call.followers > 0
+
+    def _unfollow(self):
+        """Uncounts a follower whose leader was interrupted; it will retry."""
+        with self._lock:
+            self.coalesced -= 1
+
+    @staticmethod
+    def _follow(result, error):
+        if error is not None:
+            raise copy.copy(error) from error
+        return copy_document(result)
+
+    def run(self, key, fn):
+        """Returns fn(), or a copy of the result of an identical call in flight."""
+        while True:
+            call, leader = self._join(self._calls, key, _Call)
+            if leader:
+                break
+            call.done.wait()
+            if not call.abandoned:
+                return self._follow(call.result, call.error)
+            self._unfollow()
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.abandoned = True
+            raise
+        finally:
+            if self._finish(self._calls, key, call) and call.error is None \
+                    and not call.abandoned:
+                # Followers copy from a snapshot taken before the leader's
+                # caller gets the document, so its changes never reach them.
+                call.result = copy_document(call.result)
+            call.done.set()
+
+    async def run_async(self, key, fn):
+        """Awaits fn(), or a copy of the result of an identical call in flight."""
+        while True:
+            call, leader = self._join(self._async_calls, key, _AsyncCall)
+            if leader:
+                break
+            await asyncio.wait([call.future])
+            outcome = call.future.result()
+            if outcome is not None:
+                return self._follow(*outcome)
+            self._unfollow()
+        result, error, abandoned = None, None, False
+        try:
+            result = await fn()
+            return result
+        except Exception as e:
+            error = e
+            raise
+        except BaseException:
+            abandoned = True
+            raise
+        finally:
+            followers = self._finish(self._async_calls, key, call)
+            if abandoned:
+                call.future.set_result(None)
+            elif followers and error is None:
+                call.future.set_result((copy_document(result), None))
+            else:
+                call.future.set_result((result, error))
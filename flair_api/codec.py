@@ -0,0 +1,88 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - depends on the environment
+    ujson = None
+
+
+class JsonCodec(object):
+    """
+    Encodes request bodies and decodes response bodies using the standard
+    library json module.
+
+    Subclasses wrap faster JSON libraries. loads accepts bytes or str and
+    raises ValueError for malformed documents; dumps returns UTF-8 bytes.
+    """
+    name = 'json'
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False,
+                          allow_nan=False).encode('utf-8')
+
+    def decode(self, resp):
+        """Decodes the body of an HTTP response."""
+        return self.loads(resp.content)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+
+class UjsonCodec(JsonCodec):
+    name = 'ujson'
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+
+CODECS = {'json': JsonCodec, 'orjson': OrjsonCodec, 'ujson': UjsonCodec}
+
+
+def available_codecs():
+    """Returns the names of the codecs usable in this environment, fastest first."""
+    names = []
+    if orjson is not None:
+        names.append('orjson')
+    if ujson is not None:
+        names.append('ujson')
+    names.append('json')
+    return names
+
+
+def get_codec(codec=None):
+    """
+    Returns a codec instance. codec may be a codec, a name from CODECS, or
+    None for the fastest one installed.
+    """
+    if codec is None:
+        codec = available_codecs()[0]
+    if isinstance(codec, str):
+        if codec not in available_codecs():
+            raise ValueError(f"JSON codec {codec!r} is not available. "
+                             f"Available codecs: {', '.join(available_codecs())}")
+        return CODECS[codec]()
+    return codec
+
+
+default_codec = get_codec()
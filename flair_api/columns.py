@@ -0,0 +1,111 @@
+import re
+from datetime import datetime, timezone
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}')
+UTC_OFFSET_RE = re.compile(r'[+-]\d{2}:?\d{2}$')
+
+
+def records_to_columns(records, fields=None):
+    """
+    Collects the attributes of JSON-API records into columns.
+
+    Returns {'id': [...], field: [...], ...} with one value per record, None
+    where a record lacks the attribute. Without fields, every attribute
+    seen is collected, in the order first seen.
+    """
+    columns = {'id': []}
+    if fields is not None:
+        for field in fields:
+            columns[field] = []
+    count = 0
+    for record in records:
+        columns['id'].append(record.get('id'))
+        attributes = record.get('attributes') or {}
+        if fields is None:
+            for field in attributes:
+                if field not in columns:
+                    columns[field] = [None] * count
+        for field, values in columns.items():
+            if field != 'id':
+                values.append(attributes.get(field))
+        count += 1
+    return columns
+
+
+def column_kind(values):
+    """
+    Infers the type of a column: 'bool', 'int', 'float', 'datetime' (ISO
+    8601 strings) or 'object'. Missing values are allowed in any column;
+    an int column with missing values is reported as 'float'.
+    """
+    kinds = set()
+    missing = False
+    for value in values:
+        if value is None:
+            missing = True
+        elif isinstance(value, bool):
+            kinds.add('bool')
+        elif isinstance(value, int):
+            kinds.add('int')
+        elif isinstance(value, float):
+            kinds.add('float')
+        elif isinstance(value, str) and TIMESTAMP_RE.match(value):
+            kinds.add('datetime')
+        else:
+            return 'object'
+    if kinds == {'int'}:
+        return 'float' if missing else 'int'
+    if kinds <= {'int', 'float'} and kinds:
+        return 'float'
+    if kinds == {'bool'} and not missing:
+        return 'bool'
+    if kinds == {'datetime'}:
+        return 'datetime'
+    return 'object'
+
+
+def utc_timestamp(value):
+    """Returns an ISO 8601 timestamp as a naive UTC string numpy can parse."""
+    if value is None:
+        return 'NaT'
+    if value.endswith('Z'):
+        return value[:-1]
+    if 'T' in value and UTC_OFFSET_RE.search(value):
+        parsed = datetime.fromisoformat(value)
+        return parsed.astimezone(timezone.utc).replace(tzinfo=None).isoformat()
+    return value
+
+
+def column_to_array(values, kind=None):
+    """Converts a column to a numpy array of the inferred (or given) kind."""
+    kind = kind or column_kind(values)
+    if kind == 'int':
+        return numpy.array(values, dtype=numpy.int64)
+    if kind == 'float':
+        return numpy.array([numpy.nan if v is None else v for v in values], dtype=numpy.float64)
+    if kind == 'bool':
+        return numpy.array(values, dtype=bool)
+    if kind == 'datetime':
+        return numpy.array([utc_timestamp(v) for v in values], dtype='datetime64[ms]')
+    if kind == 'object':
+        return numpy.array(values, dtype=object)
+    return numpy.array(values, dtype=kind)
+
+
+def columns_to_numpy(columns, dtypes=None):
+    """
+    Converts columns to numpy arrays. dtypes maps field names to a kind
+    ('int', 'float', 'bool', 'datetime', 'object') or a numpy dtype,
+    overriding the inferred one.
+    """
+    if numpy is None:
+        raise ImportError("NumPy is required for to_numpy. "
+                          "Install it with: pip install flair-client[numpy]")
+    dtypes = dtypes or {}
+    return {field: column_to_array(values, dtypes.get(field))
+            for field, values in columns.items()}
@@ -0,0 +1,89 @@
+import time
+import weakref
+import threading
+from collections import OrderedDict
+
+
+class IdentityMap(object):
+    """
+    Keeps one live Resource per (type, id).
+
+    Resources are tracked through weak references, so any instance still
+    used by the application keeps being reused and refreshed in place. The
+    `max_size` most recently loaded resources are also held strongly so
+    they survive between requests; older ones are released in LRU order.
+    Resources loaded less than `max_age` seconds ago are considered fresh
+    and can be returned by Client.get without a request.
+    """
+    def __init__(self, max_size=1024, max_age=30):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._refs = {}
+        self._recent = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(type_, id_):
+        return (type_, str(id_))
+
+    def __len__(self):
+        return len(self._refs)
+
+    def _forget(self, key, ref):
+        with self._lock:
+            current = self._refs.get(key)
+            if current is not None and current[0] is ref:
+                del self._refs[key]
+
+    def get(self, type_, id_):
+        """Returns the live resource for (type_, id_), however old, or None."""
+        key = self.key(type_, id_)
+        with self._lock:
+            entry = self._refs.get(key)
+            return entry[0]() if entry is not None else None
+
+    def fresh(self, type_, id_):
+        """Returns the live resource for (type_, id_) if it was loaded within max_age."""
+        key = self.key(type_, id_)
+        with self._lock:
+            entry = self._refs.get(key)
+            if entry is None or self.max_age is None:
+                return None
+            resource = entry[0]()
+            if resource is None or time.monotonic() - entry[1] >= self.max_age:
+                return None
+            self._recent[key] = resource
+            self._recent.move_to_end(key)
+            return resource
+
+    def add(self, resource):
+        """Registers resource as the live instance for its (type, id) and marks it loaded now."""
+        key = self.key(resource.type_, resource.id_)
+        with self._lock:
+            ref = weakref.ref(resource, lambda r, key=key: self._forget(key, r))
+            self._refs[key] = (ref, time.monotonic())
+            self._recent[key] = resource
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.max_size:
+                self._recent.popitem(last=False)
+        return resource
+
+    def expire(self, type_, id_):
+        """Marks the resource as stale so the next Client.get fetches it again."""
+        key = self.key(type_, id_)
+        with self._lock:
+            entry = self._refs.get(key)
+            if entry is not None:
+                self._refs[key] = (entry[0], float('-inf'))
+
+    def discard(self, type_, id_):
+        """Removes the resource for (type_, id_), e.g. after it was deleted."""
+        key = self.key(type_, id_)
+        with self._lock:
+            self._refs.pop(key, None)
+            self._recent.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._refs.clear()
+            self._recent.clear()
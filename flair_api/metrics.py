@@ -0,0 +1,199 @@
+import bisect
+import logging
+import threading
+from urllib.parse import urlsplit
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def resource_type_from_url(url):
+    """
+    Guesses the resource type a JSON-API URL refers to, e.g. 'rooms' for
+    /api/structures/1/rooms or /api/structures/1/relationships/rooms.
+    """
+    segments = [s for s in urlsplit(url).path.split('/') if s]
+    if segments and segments[0] == 'api':
+        segments = segments[1:]
+    segments = [s for s in segments if s != 'relationships']
+    if not segments:
+        return 'root'
+    return segments[-2] if len(segments) % 2 == 0 else segments[-1]
+
+
+class RequestInfo(object):
+    """
+    Describes one API request to instrumentation hooks. before_request
+    hooks see the method, URL and resource type; after_request hooks also
+    get the status (None if no response was received), latency in seconds,
+    request and response body sizes, retries, whether the response was
+    served from the cache and the error raised, if any.
+    """
+    __slots__ = ('method', 'url', 'resource_type', 'status', 'latency', 'bytes_out',
+                 'bytes_in', 'retries', 'cached', 'error')
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.resource_type = resource_type_from_url(url)
+        self.status = None
+        self.latency = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.retries = 0
+        self.cached = False
+        self.error = None
+
+    def record_response(self, resp, body, retries):
+        self.status = resp.status_code
+        self.bytes_in = len(resp.content or b'')
+        self.bytes_out = len(body or b'')
+        self.retries = retries
+        self.cached = resp.status_code == 304
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}<{self.method} {self.resource_type} "
+                f"status={self.status} latency={self.latency:.3f}s retries={self.retries}>")
+
+
+def run_hooks(hooks, *args):
+    """Calls every hook, logging instead of raising their failures."""
+    for hook in hooks:
+        try:
+            hook(*args)
+        except Exception as e:
+            logging.warning(f"Instrumentation hook {hook!r} failed: {e}")
+
+
+class Histogram(object):
+    """Cumulative latency histogram in the Prometheus style."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Returns [(upper bound, observations <= bound), ...] ending with +Inf."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append((float('inf'), self.count))
+        return result
+
+    def quantile(self, q):
+        """Estimates a quantile as the upper bound of the bucket containing it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+def _labels(**labels):
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry(object):
+    """
+    In-process request metrics: request counts by method, resource type
+    and status, latency histograms by method and resource type, bytes
+    sent and received, retries, cache hits and token refreshes. Attach it
+    to one or more clients with attach(), or pass it as Client(metrics=...).
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.requests = {}
+        self.latency = {}
+        self.bytes_in = {}
+        self.bytes_out = {}
+        self.retries = 0
+        self.cache_hits = 0
+        self.token_refreshes = 0
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        """Records the requests and token refreshes of client."""
+        client.after_request.append(self.observe)
+        client.on_token_refresh.append(self.token_refreshed)
+        return client
+
+    def observe(self, info):
+        status = 'none' if info.status is None else str(info.status)
+        with self._lock:
+            key = (info.method, info.resource_type, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get((info.method, info.resource_type))
+            if histogram is None:
+                histogram = self.latency[(info.method, info.resource_type)] = \
+                    Histogram(self.buckets)
+            histogram.observe(info.latency)
+            self.bytes_in[info.resource_type] = \
+                self.bytes_in.get(info.resource_type, 0) + info.bytes_in
+            self.bytes_out[info.resource_type] = \
+                self.bytes_out.get(info.resource_type, 0) + info.bytes_out
+            self.retries += info.retries
+            if info.cached:
+                self.cache_hits += 1
+
+    def token_refreshed(self, client):
+        with self._lock:
+            self.token_refreshes += 1
+
+    def to_prometheus(self, prefix='flair_client'):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        with self._lock:
+            metric('requests_total', 'counter', 'API requests by method, resource type and status.')
+            for (method, type_, status), count in sorted(self.requests.items()):
+                lines.append(f"{prefix}_requests_total"
+                             f"{_labels(method=method, resource_type=type_, status=status)} {count}")
+            metric('request_duration_seconds', 'histogram', 'API request latency.')
+            for (method, type_), histogram in sorted(self.latency.items()):
+                for bound, total in histogram.cumulative():
+                    labels = _labels(method=method, resource_type=type_, le=_number(bound))
+                    lines.append(f"{prefix}_request_duration_seconds_bucket{labels} {total}")
+                labels = _labels(method=method, resource_type=type_)
+                lines.append(f"{prefix}_request_duration_seconds_sum{labels} {_number(histogram.sum)}")
+                lines.append(f"{prefix}_request_duration_seconds_count{labels} {histogram.count}")
+            for name, values, help_text in (
+                    ('response_bytes_total', self.bytes_in, 'Response body bytes received.'),
+                    ('request_bytes_total', self.bytes_out, 'Request body bytes sent.')):
+                metric(name, 'counter', help_text)
+                for type_, total in sorted(values.items()):
+                    lines.append(f"{prefix}_{name}{_labels(resource_type=type_)} {total}")
+            for name, value, help_text in (
+                    ('retries_total', self.retries, 'Requests retried after transient failures.'),
+                    ('cache_hits_total', self.cache_hits, 'Requests answered from the response cache.'),
+                    ('token_refreshes_total', self.token_refreshes, 'Access tokens obtained.')):
+                metric(name, 'counter', help_text)
+                lines.append(f"{prefix}_{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def prometheus_text(registry, prefix='flair_client'):
+    """Returns a MetricsRegistry's metrics in the Prometheus text format."""
+    return registry.to_prometheus(prefix)
@@ -0,0 +1,143 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from .client import Client
+
+
+class ClientPool(object):
+    """
+    Serves many Flair accounts from one process.
+
+    Accounts are registered with their credentials, which is cheap; a
+    Client is only created the first time an account is used. All clients
+    share one pooled session (at most `pool_maxsize` connections per host)
+    and one copy of the API root links. Each account may have at most
+    `max_concurrency` requests in flight and send `rate` requests per
+    second, so busy accounts cannot starve the others. At most
+    `max_clients` clients are kept, and clients unused for `idle_timeout`
+    seconds can be dropped with evict_idle(); evicted accounts keep their
+    credentials and get a new client (and token) when used again. With a
+    state_store, tokens survive eviction.
+    """
+    def __init__(self, root='https://api.flair.co/', max_clients=1000, idle_timeout=None,
+                 max_concurrency=4, rate=None, pool_connections=10, pool_maxsize=50,
+                 pool_block=True, state_store=None, client_class=Client, **client_kwargs):
+        self.root = root
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.state_store = state_store
+        self.client_class = client_class
+        self.client_kwargs = client_kwargs
+        self.session = Client._build_session(pool_connections, pool_maxsize, pool_block)
+        self.api_root_resp = None
+        self.created = 0
+        self.evicted = 0
+        self._accounts = {}
+        self._clients = OrderedDict()
+        self._last_used = {}
+        self._lock = threading.RLock()
+        self._root_lock = threading.Lock()
+
+    def register(self, account, client_id, client_secret, **kwargs):
+        """Registers an account's credentials and per-account Client kwargs."""
+        with self._lock:
+            self._accounts[account] = (client_id, client_secret, kwargs)
+
+    def unregister(self, account):
+        with self._lock:
+            self._accounts.pop(account, None)
+            self._evict(account)
+
+    def __contains__(self, account):
+        return account in self._accounts
+
+    def __len__(self):
+        """Number of registered accounts."""
+        return len(self._accounts)
+
+    @property
+    def active(self):
+        """Accounts that currently have a client, least recently used first."""
+        with self._lock:
+            return list(self._clients)
+
+    def __getitem__(self, account):
+        return self.client(account)
+
+    def client(self, account):
+        """Returns the account's client, creating it on first use."""
+        with self._lock:
+            client = self._clients.get(account)
+            if client is not None:
+                self._clients.move_to_end(account)
+                self._last_used[account] = time.monotonic()
+                return client
+            if account not in self._accounts:
+                raise KeyError(f"Account {account!r} is not registered.")
+            client = self._create(account)
+            self._clients[account] = client
+            self._last_used[account] = time.monotonic()
+            while len(self._clients) > self.max_clients:
+                self._evict(next(iter(self._clients)))
+        self._share_api_root(client)
+        return client
+
+    def _create(self, account):
+        client_id, client_secret, kwargs = self._accounts[account]
+        kwargs = dict(self.client_kwargs, **kwargs)
+        kwargs.setdefault('max_concurrency', self.max_concurrency)
+        kwargs.setdefault('rate_limiter', self.rate)
+        kwargs.setdefault('state_store', self.state_store)
+        client = self.client_class(client_id=client_id, client_secret=client_secret,
+                                   api_root=self.root, session=self.session, **kwargs)
+        client.load_state()
+        self.created += 1
+        return client
+
+    def _share_api_root(self, client):
+        """Gives a client the shared root links, fetching them once if needed."""
+        if self.api_root_resp is None:
+            with self._root_lock:
+                if self.api_root_resp is None:
+                    if client.api_root_resp is None:
+                        client.api_root_response()
+                    self.api_root_resp = client.api_root_resp
+        if self.api_root_resp is not None:
+            client.api_root_resp = self.api_root_resp
+
+    def _evict(self, account):
+        client = self._clients.pop(account, None)
+        self._last_used.pop(account, None)
+        if client is not None:
+            client.close()
+            self.evicted += 1
+            logging.debug(f"Evicted client of account {account!r}.")
+
+    def evict_idle(self, now=None):
+        """Drops the clients of accounts unused for idle_timeout seconds. Returns how many."""
+        if self.idle_timeout is None:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [account for account, used in self._last_used.items()
+                    if now - used >= self.idle_timeout]
+            for account in idle:
+                self._evict(account)
+        return len(idle)
+
+    def close(self):
+        """Drops all clients and closes the shared session."""
+        with self._lock:
+            for account in list(self._clients):
+                self._evict(account)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
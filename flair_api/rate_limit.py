@@ -0,0 +1,137 @@
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value, now=None):
+    """Parses a Retry-After header (seconds or HTTP date) into seconds to wait."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, retry_at - (now or time.time()))
+
+
+def _header(headers, *names):
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+class RateLimiter(object):
+    """
+    Token-bucket limiter for API requests, safe to share between threads.
+
+    Requests are sent at up to `rate` per second with bursts of `burst`.
+    When the API throttles (HTTP 429), sending pauses for the Retry-After
+    period and the rate is multiplied by `decrease` (down to `min_rate`);
+    every successful response then raises it by `increase`, up to
+    `max_rate`. A response reporting no remaining quota pauses sending
+    until the quota resets. Throttled requests are retried up to
+    `max_retries` times, since the API did not process them.
+    """
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate=10.0, burst=None, min_rate=0.5, max_rate=None,
+                 increase=None, decrease=0.5, max_retries=2, default_retry_after=1.0):
+        if rate <= 0:
+            raise ValueError("Rate must be positive.")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.min_rate = min(float(min_rate), self.rate)
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.increase = float(increase if increase is not None else rate / 100.0)
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.default_retry_after = default_retry_after
+        self.throttled = 0
+        self.waited = 0.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, key, **kwargs):
+        """Returns the limiter registered under key, creating it with kwargs if needed."""
+        with cls._shared_lock:
+            limiter = cls._shared.get(key)
+            if limiter is None:
+                limiter = cls._shared[key] = cls(**kwargs)
+            return limiter
+
+    def _refill(self, now):
+        # Tokens do not accumulate while paused, so a pause is not followed by a burst.
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def _reserve(self):
+        """Takes a token and returns how long the caller must wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(0.0, self._paused_until - now)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            self.waited += wait
+            return wait
+
+    def acquire(self):
+        """Blocks until a request may be sent. Returns the time waited."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """Waits without blocking the event loop until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Stops sending for the given number of seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def on_response(self, status_code, headers):
+        """Adapts the send rate to a response's status and rate-limit headers."""
+        if status_code == 429:
+            retry_after = parse_retry_after(headers.get('Retry-After'))
+            with self._lock:
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.pause(retry_after if retry_after is not None else self.default_retry_after)
+            return
+        remaining = _header(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+        reset = _header(headers, 'X-RateLimit-Reset', 'RateLimit-Reset')
+        if remaining is not None and reset is not None:
+            try:
+                remaining, reset = int(remaining), float(reset)
+            except ValueError:
+                remaining = None
+            if remaining == 0:
+                # Reset is either an epoch timestamp or a number of seconds.
+                self.pause(reset - time.time() if reset > 1e9 else reset)
+                return
+        if status_code < 400:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.increase)
@@ -0,0 +1,60 @@
+import time
+import random
+import threading
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'])
+
+
+class RetryPolicy(object):
+    """
+    Retries transient failures with decorrelated-jitter exponential backoff.
+
+    Requests using one of `methods` are retried after connection errors or
+    a response with one of `statuses`. Other methods (by default POST, which
+    is not idempotent) are only retried when the connection could not be
+    established, so the request is known not to have reached the API. No
+    request is retried more than `max_retries` times or past `deadline`
+    seconds after it was first sent.
+    """
+    def __init__(self, max_retries=3, base_delay=0.1, max_delay=5.0, deadline=30.0,
+                 statuses=(502, 503, 504), methods=IDEMPOTENT_METHODS):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.retries = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def backoff(self, previous):
+        """Returns the next sleep given the previous one (decorrelated jitter)."""
+        upper = max(self.base_delay, previous * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+    def is_retryable(self, method, status=None, error=None, sent=True):
+        if error is not None:
+            return not sent or method.upper() in self.methods
+        return status in self.statuses and method.upper() in self.methods
+
+    def next_delay(self, method, attempt, started, previous,
+                   status=None, error=None, sent=True, retry_after=None):
+        """
+        Returns how long to sleep before retrying a failed attempt, or None
+        if it should not be retried. `attempt` counts the retries so far.
+        """
+        if not self.is_retryable(method, status, error, sent):
+            return None
+        delay = self.backoff(previous)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        elapsed = time.monotonic() - started
+        if attempt >= self.max_retries or \
+                (self.deadline is not None and elapsed + delay > self.deadline):
+            with self._lock:
+                self.exhausted += 1
+            return None
+        with self._lock:
+            self.retries += 1
+        return delay
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+class StateStore(object):
+    """
+    Persists client state (API root links and OAuth tokens) between runs.
+
+    State is a JSON-serializable dict per client identity. Subclasses
+    implement _read_all and _write_all, and _acquire/_release to share the
+    lock with other processes; the base class keeps state in memory only.
+    """
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    def _read_all(self):
+        return dict(self._state)
+
+    def _write_all(self, states):
+        self._state = states
+
+    def _acquire(self):
+        """Acquires any lock shared with other processes."""
+
+    def _release(self):
+        """Releases the lock taken by _acquire."""
+
+    @contextmanager
+    def lock(self):
+        """
+        Holds the store exclusively. Clients renew tokens while holding the
+        lock, so concurrent clients wait and then adopt the renewed token
+        instead of renewing it themselves. The lock is reentrant.
+        """
+        with self._lock:
+            if self._depth == 0:
+                self._acquire()
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._release()
+
+    def load(self, key):
+        """Returns the stored state for key, or None."""
+        with self.lock():
+            return self._read_all().get(key)
+
+    def save(self, key, state):
+        """Stores state for key, keeping the state of other identities."""
+        with self.lock():
+            states = self._read_all()
+            states[key] = state
+            self._write_all(states)
+
+    def clear(self, key):
+        with self.lock():
+            states = self._read_all()
+            if states.pop(key, None) is not None:
+                self._write_all(states)
+
+
+class FileStateStore(StateStore):
+    """
+    Stores client state in a JSON file readable only by its owner.
+
+    Writes go to a temporary file that atomically replaces the old one, so
+    readers never see a partially written file. The store is locked with an
+    OS file lock on a sibling `.lock` file, so processes on the same host
+    sharing the file renew tokens one at a time.
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.lock_path = self.path + '.lock'
+        self._lock_file = None
+
+    def _acquire(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock_file = open(self.lock_path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _read_all(self):
+        try:
+            with open(self.path, 'r') as f:
+                states = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning(f"Ignoring unreadable client state file {self.path}")
+            return {}
+        return states if isinstance(states, dict) else {}
+
+    def _write_all(self, states):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.flair-state-')
+        try:
+            os.chmod(tmp_path, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(states, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def token_is_valid(state, now=None):
+    """Returns True if the stored access token has not expired."""
+    if not state or not state.get('access_token'):
+        return False
+    expires_at = state.get('expires_at')
+    return expires_at is None or (now or time.time()) < expires_at
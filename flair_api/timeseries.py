@@ -0,0 +1,133 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+
+def parse_timestamp(value):
+    """Parses a datetime or ISO 8601 string into an aware UTC datetime, or None."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def format_timestamp(value):
+    """Formats an aware datetime as an ISO 8601 UTC string."""
+    return value.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def split_windows(start, end, window):
+    """Splits [start, end) into consecutive half-open windows of at most `window`."""
+    start, end = parse_timestamp(start), parse_timestamp(end)
+    if not isinstance(window, timedelta):
+        window = timedelta(seconds=window)
+    if window <= timedelta(0):
+        raise ValueError("Window must be positive.")
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+
+def default_window_params(field, start, end):
+    """Filters a collection to records whose `field` lies in [start, end)."""
+    return {f'filter[{field}][gte]': format_timestamp(start),
+            f'filter[{field}][lt]': format_timestamp(end)}
+
+
+class WindowMerger(object):
+    """
+    Orders the resources of one window by timestamp and drops those already
+    returned for the previous window, or lying outside the window, which
+    happens when the API treats window bounds inclusively.
+    """
+    def __init__(self, timestamp_field):
+        self.timestamp_field = timestamp_field
+        self._previous = set()
+
+    def timestamp(self, resource):
+        return parse_timestamp(resource.attributes.get(self.timestamp_field))
+
+    def merge(self, window, resources):
+        start, end = window
+        keyed = []
+        seen = set()
+        for resource in resources:
+            key = (resource.type_, resource.id_)
+            timestamp = self.timestamp(resource)
+            if key in self._previous or key in seen:
+                continue
+            if timestamp is not None and not start <= timestamp < end:
+                continue
+            seen.add(key)
+            keyed.append((timestamp or start, resource))
+        self._previous = seen
+        keyed.sort(key=lambda pair: pair[0])
+        return [resource for _, resource in keyed]
+
+
+def iter_windows(fetch_window, windows, max_workers, timestamp_field):
+    """
+    Fetches windows on up to max_workers threads and yields their resources
+    in timestamp order. Windows are fetched at most 2 * max_workers ahead of
+    the one being consumed, so memory stays bounded for long ranges.
+    """
+    max_workers = max(1, max_workers)
+    merger = WindowMerger(timestamp_field)
+    pending = deque()
+    windows = iter(windows)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for window in windows:
+            pending.append((window, executor.submit(fetch_window, *window)))
+            if len(pending) >= 2 * max_workers:
+                break
+        while pending:
+            window, future = pending.popleft()
+            for next_window in windows:
+                pending.append((next_window, executor.submit(fetch_window, *next_window)))
+                break
+            yield from merger.merge(window, future.result())
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def iter_windows_async(fetch_window, windows, max_concurrency, timestamp_field):
+    """Awaits windows with up to max_concurrency in flight; see iter_windows."""
+    max_concurrency = max(1, max_concurrency)
+    merger = WindowMerger(timestamp_field)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    pending = deque()
+    windows = iter(windows)
+
+    async def fetch(window):
+        async with semaphore:
+            return await fetch_window(*window)
+
+    def schedule(count):
+        for window in windows:
+            pending.append((window, asyncio.ensure_future(fetch(window))))
+            count -= 1
+            if count <= 0:
+                break
+
+    try:
+        schedule(2 * max_concurrency)
+        while pending:
+            window, task = pending.popleft()
+            schedule(1)
+            for resource in merger.merge(window, await task):
+                yield resource
+    finally:
+        for _, task in pending:
+            task.cancel()
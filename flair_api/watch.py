@@ -0,0 +1,228 @@
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+
+from .client import ApiError, ResourceCollection, resource_record
+
+
+class Change(object):
+    """
+    A change to a watched resource.
+
+    kind is 'changed', 'created' or 'deleted'. changes maps each changed
+    attribute to an (old, new) pair; attributes holds all attributes of
+    the resource as last seen.
+    """
+    def __init__(self, type_, id_, kind, changes, attributes):
+        self.type_ = type_
+        self.id_ = id_
+        self.kind = kind
+        self.changes = changes
+        self.attributes = attributes
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}<{self.kind} {self.type_}/{self.id_} {sorted(self.changes)}>"
+
+
+def diff_attributes(old, new, fields=None):
+    """Returns {name: (old, new)} for the attributes that differ."""
+    names = fields if fields is not None else set(old) | set(new)
+    return {name: (old.get(name), new.get(name)) for name in names
+            if old.get(name) != new.get(name)}
+
+
+class WatchTarget(object):
+    """A resource or collection followed by a Watcher, with its own polling interval."""
+    def __init__(self, resource_type, id_=None, params=None, fields=None, callback=None,
+                 interval=None):
+        self.resource_type = resource_type
+        self.id_ = id_
+        self.params = params or {}
+        self.fields = set(fields) if fields is not None else None
+        self.callback = callback
+        self.interval = interval
+        self.snapshots = None
+        self.polls = 0
+        self.errors = 0
+        self.active = True
+
+    def __repr__(self):
+        name = self.resource_type if self.id_ is None else f"{self.resource_type}/{self.id_}"
+        return f"{self.__class__.__name__}<{name} every {self.interval:.1f}s>"
+
+
+class Watcher(object):
+    """
+    Polls resources and collections and reports changes to their attributes.
+
+    Each target has its own polling interval: it drops to `min_interval`
+    when a poll finds changes and grows by `slowdown` after each poll
+    without changes, up to `max_interval`, so stable devices cost few
+    requests. Watching a collection follows all of its resources with one
+    request per page. Changes are passed to the target's callback and to
+    every on_change callback, and can be consumed with changes().
+    """
+    def __init__(self, client, min_interval=5.0, max_interval=300.0, slowdown=2.0,
+                 jitter=0.1, on_change=None):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.slowdown = slowdown
+        self.jitter = jitter
+        if on_change is None:
+            on_change = []
+        elif callable(on_change):
+            on_change = [on_change]
+        self.on_change = list(on_change)
+        self.polls = 0
+        self._schedule = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stop = None
+
+    def watch(self, resource_type, id=None, params=None, fields=None, callback=None):
+        """
+        Starts following a resource (with id) or a whole collection. fields
+        limits the attributes compared, and is requested as a sparse fieldset.
+        Returns the WatchTarget, which unwatch() accepts.
+        """
+        if fields is not None:
+            params = dict(params or {}, fields={resource_type: list(fields)})
+        target = WatchTarget(resource_type, id, params, fields, callback, self.min_interval)
+        self._push(target, time.monotonic())
+        return target
+
+    def unwatch(self, target):
+        target.active = False
+
+    @property
+    def targets(self):
+        with self._lock:
+            return [target for _, _, target in self._schedule if target.active]
+
+    def _push(self, target, due):
+        with self._lock:
+            heapq.heappush(self._schedule, (due, next(self._seq), target))
+        self._wakeup.set()
+
+    def next_due(self):
+        """Returns when the next target is due to be polled, or None."""
+        with self._lock:
+            while self._schedule and not self._schedule[0][2].active:
+                heapq.heappop(self._schedule)
+            return self._schedule[0][0] if self._schedule else None
+
+    def _fetch(self, target):
+        """Returns the current records of a target by (type, id)."""
+        if target.id_ is None:
+            result = self.client.get(target.resource_type, params=target.params)
+        else:
+            url = self.client.resource_url(target.resource_type, target.id_)
+            result = self.client.get_url(url, **target.params)
+        if isinstance(result, ResourceCollection):
+            records = result.iter_raw()
+        else:
+            records = [resource_record(result)] if result is not None else []
+        return {(r['type'], str(r['id'])): dict(r.get('attributes') or {}) for r in records}
+
+    def _diff(self, target, current):
+        previous = target.snapshots
+        target.snapshots = current
+        if previous is None:
+            return []
+        changes = []
+        for key, attributes in current.items():
+            old = previous.get(key)
+            if old is None:
+                changes.append(Change(key[0], key[1], 'created',
+                                      diff_attributes({}, attributes, target.fields), attributes))
+                continue
+            diff = diff_attributes(old, attributes, target.fields)
+            if diff:
+                changes.append(Change(key[0], key[1], 'changed', diff, attributes))
+        for key, attributes in previous.items():
+            if key not in current:
+                changes.append(Change(key[0], key[1], 'deleted', {}, attributes))
+        return changes
+
+    def poll_target(self, target):
+        """Polls one target now, adapts its interval and returns its changes."""
+        target.polls += 1
+        self.polls += 1
+        try:
+            current = self._fetch(target)
+        except ApiError as e:
+            if e.status_code == 404 and target.id_ is not None and target.snapshots:
+                current = {}
+            else:
+                target.errors += 1
+                logging.warning(f"Polling {target!r} failed: {e}")
+                target.interval = self.max_interval
+                return []
+        changes = self._diff(target, current)
+        if changes:
+            target.interval = self.min_interval
+        else:
+            target.interval = min(self.max_interval, target.interval * self.slowdown)
+        if target.id_ is not None and not current and target.snapshots is not None:
+            target.active = False
+        for change in changes:
+            for callback in ([target.callback] if target.callback else []) + self.on_change:
+                try:
+                    callback(change)
+                except Exception as e:
+                    logging.warning(f"Watch callback {callback!r} failed: {e}")
+        return changes
+
+    def poll(self, now=None):
+        """Polls every target that is due and returns their changes."""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                _, _, target = heapq.heappop(self._schedule)
+                if target.active:
+                    due.append(target)
+        changes = []
+        for target in due:
+            changes.extend(self.poll_target(target))
+            if target.active:
+                spread = 1 + random.uniform(-self.jitter, self.jitter)
+                self._push(target, now + target.interval * spread)
+        return changes
+
+    def changes(self, stop=None):
+        """
+        Polls in the calling thread and yields changes as they are found,
+        until the stop event is set.
+        """
+        while stop is None or not stop.is_set():
+            self._wakeup.clear()
+            yield from self.poll()
+            due = self.next_due()
+            timeout = self.max_interval if due is None else max(0.0, due - time.monotonic())
+            self._wakeup.wait(timeout)
+
+    def start(self):
+        """Polls in a background thread, reporting changes to callbacks only."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def _run(self, stop):
+        for _ in self.changes(stop):
+            pass
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
@@ -12,6 +12,9 @@ setup(name='flair-client',
       python_requires='>=3.8',
       install_requires=['requests'],
       extras_require={
-          'dev': ['python-dotenv>=1.0.0,<2.0.0']
+          'dev': ['python-dotenv>=1.0.0,<2.0.0'],
+          'async': ['httpx>=0.27.0,<1.0.0'],
+          'fast': ['orjson>=3.8'],
+          'numpy': ['numpy>=1.20']
       }
 )
\ No newline at end of file
@@ -1,6 +1,6 @@
 import pytest
 from flair_api import make_client
-from flair_api.client import DEFAULT_CLIENT_HEADERS
+from flair_api.client import DEFAULT_CLIENT_HEADERS, ApiError
 import requests_mock
 
 @pytest.fixture
@@ -193,3 +193,1047 @@ def test_client_fallback_to_oauth1(api_client_fallback, api_root, api_token):
     assert api_client_fallback.api_root_resp == api_root['links']
     # Client should still be configured for OAuth 2.0, but authentication would have fallen back
     assert api_client_fallback.oauth_version == 2
+
+# Connection pooling tests
+def test_client_shares_pooled_session(mock_api):
+    with make_client('client_id', 'client_secret', 'http://example.com',
+                     pool_maxsize=4) as client:
+        assert client.session.get_adapter('http://example.com').\
+            _pool_maxsize == 4
+        client.get('structures')
+        client.get('structures', id=1)
+        assert mock_api.call_count == 4
+
+def test_client_close_keeps_external_session(mock_api):
+    import requests
+
+    class TrackingSession(requests.Session):
+        closed = False
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    session = TrackingSession()
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         session=session)
+    assert client.session is session
+    client.close()
+    assert session.closed is False
+
+def test_client_keep_alive_disabled(mock_api):
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         keep_alive=False)
+    client.get('structures')
+    assert mock_api.last_request.headers['Connection'] == 'close'
+
+def test_client_reaps_idle_connections(api_client):
+    api_client.idle_timeout = 0
+    api_client.get('structures')
+    assert api_client.reap_idle_connections() is True
+    api_client.idle_timeout = None
+    assert api_client.reap_idle_connections() is False
+
+# asyncio client tests
+@pytest.fixture
+def async_transport(api_root, api_token, structure_body):
+    httpx = pytest.importorskip('httpx')
+
+    def handler(request):
+        path = request.url.path
+        if path == '/oauth2/token':
+            return httpx.Response(200, json={'access_token': api_token, 'expires_in': 3600})
+        if path == '/api/':
+            return httpx.Response(200, json=api_root)
+        assert request.headers['Authorization'] == 'Bearer ' + api_token
+        if path == '/api/structures' and request.url.params.get('page') == '2':
+            return httpx.Response(200, json=dict(meta={}, data=[dict(structure_body, id='2')]))
+        if path == '/api/structures':
+            return httpx.Response(200, json=dict(
+                meta={'next': '/api/structures?page=2'}, data=[structure_body]))
+        if path == '/api/structures/1' and request.method == 'PATCH':
+            return httpx.Response(200, json=dict(
+                meta={}, data=dict(structure_body, attributes={'name': 'Better Name'})))
+        if path == '/api/structures/1' and request.method == 'DELETE':
+            return httpx.Response(204)
+        if path == '/api/structures/1':
+            return httpx.Response(200, json=dict(meta={}, data=structure_body))
+        if path == '/api/structures/1/rooms':
+            return httpx.Response(200, json=dict(meta={}, data=[]))
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+def test_async_client(async_transport):
+    import asyncio
+    import httpx
+    from flair_api import make_async_client, AsyncResource
+
+    async def scenario():
+        session = httpx.AsyncClient(transport=async_transport)
+        async with await make_async_client('client_id', 'client_secret',
+                                           'http://example.com',
+                                           session=session) as client:
+            structure = await client.get('structures', id=1)
+            assert isinstance(structure, AsyncResource)
+            rooms = await structure.get_rel('rooms')
+            assert len(rooms) == 0
+            await structure.update(attributes=dict(name='Better Name'))
+            assert structure.attributes['name'] == 'Better Name'
+            await structure.delete()
+            assert structure.deleted is True
+            structures = await client.get('structures')
+            ids = [s.id_ async for s in structures]
+        await session.aclose()
+        return ids
+
+    assert asyncio.run(scenario()) == ['1', '2']
+
+def test_async_client_unexpected_status_is_not_httpx_error(api_root):
+    import asyncio
+    import httpx
+    from flair_api import AsyncClient
+    from flair_api.client import AuthenticationError
+
+    def handler(request):
+        if request.url.path == '/api/':
+            return httpx.Response(200, json=api_root)
+        return httpx.Response(302, text='moved', headers={'Location': '/elsewhere'})
+
+    async def scenario():
+        session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client = AsyncClient('client_id', 'client_secret', 'http://example.com',
+                             session=session, fallback_to_legacy_auth=False)
+        with pytest.raises(AuthenticationError):
+            await client.authenticate()
+        client.access_token = 'token'
+        assert await client.get('structures', id=1) == 'moved'
+        await session.aclose()
+
+    asyncio.run(scenario())
+
+# Read-ahead pagination tests
+@pytest.fixture
+def paged_api(mock_api, structure_body):
+    mock_api.get('http://example.com/api/structures',
+                 json=dict(meta={'next': '/api/structures?page=2'},
+                           data=[dict(structure_body, id='1')]))
+    for page in (2, 3):
+        next_link = {'next': f'/api/structures?page={page + 1}'} if page < 3 else {}
+        mock_api.get(f'http://example.com/api/structures?page={page}',
+                     json=dict(meta=next_link, data=[dict(structure_body, id=str(page))]))
+    return mock_api
+
+def test_collection_read_ahead(paged_api, api_client):
+    structures = api_client.get('structures')
+    assert [s.id_ for s in structures.read_ahead(depth=2)] == ['1', '2', '3']
+    assert len(structures) == 3
+
+def test_client_read_ahead_pages(paged_api):
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         read_ahead_pages=1)
+    assert [s.id_ for s in client.get('structures')] == ['1', '2', '3']
+
+def test_collection_read_ahead_error(paged_api, api_client):
+    paged_api.get('http://example.com/api/structures?page=3', status_code=500)
+    structures = api_client.get('structures')
+    with pytest.raises(ApiError):
+        list(structures.read_ahead())
+
+@pytest.mark.parametrize('read_ahead', [0, 2])
+def test_collection_stream(paged_api, api_client, read_ahead):
+    structures = api_client.get('structures')
+    assert [s.id_ for s in structures.stream(read_ahead=read_ahead)] == ['1', '2', '3']
+    assert len(structures) == 1
+    assert structures.meta['next'] == '/api/structures?page=2'
+
+# Bulk operation tests
+def test_client_bulk_update(mock_api, api_client):
+    mock_api.patch('http://example.com/api/structures/2', status_code=500)
+    result = api_client.bulk_update([
+        ('structures', 1, {'name': 'Better Name'}),
+        dict(resource_type='structures', id=2, attributes={'name': 'Broken'}),
+    ], max_workers=2)
+    assert len(result) == 2
+    assert result[0].ok and result[0].result.attributes['name'] == 'Better Name'
+    assert isinstance(result.errors[1], ApiError)
+    stats = result.stats()
+    assert stats['succeeded'] == 1 and stats['failed'] == 1
+
+def test_client_bulk_create_and_delete(api_client):
+    created = api_client.bulk_create([('structures', {'name': 'Home Sweet Home'})] * 3)
+    assert created.ok and len(created.succeeded) == 3
+    deleted = api_client.bulk_delete([('structures', 1)])
+    assert deleted.ok and deleted[0].result is None
+
+# Response cache tests
+def test_client_cache_revalidates_with_etag(mock_api, structure_body):
+    from flair_api.cache import ResponseCache
+    cache = ResponseCache()
+    client = make_client('client_id', 'client_secret', 'http://example.com', cache=cache)
+    mock_api.get('http://example.com/api/structures/1', [
+        {'json': dict(meta={}, data=structure_body), 'headers': {'ETag': '"v1"'}},
+        {'status_code': 304},
+    ])
+    first = client.get('structures', id=1)
+    first.attributes['name'] = 'Changed locally'
+    second = client.get('structures', id=1)
+    assert mock_api.last_request.headers['If-None-Match'] == '"v1"'
+    assert second.attributes['name'] == 'Home Sweet Home'
+    assert cache.revalidations == 1
+
+def test_client_cache_fresh_hits_and_invalidation(mock_api):
+    from flair_api.cache import ResponseCache
+    cache = ResponseCache(fresh_for=60)
+    client = make_client('client_id', 'client_secret', 'http://example.com', cache=cache)
+    client.get('structures')
+    client.get('structures', id=1)
+    calls = mock_api.call_count
+    client.get('structures', id=1)
+    client.get('structures')
+    assert mock_api.call_count == calls
+    assert cache.hits == 2
+    client.update('structures', 1, attributes={'name': 'Better Name'})
+    assert len(cache) == 0
+
+def test_response_cache_lru_eviction():
+    from flair_api.cache import ResponseCache
+    cache = ResponseCache(max_entries=2, fresh_for=60)
+    for i in range(3):
+        cache.store(ResponseCache.key(f'http://example.com/api/rooms/{i}', None, 'id'),
+                    f'http://example.com/api/rooms/{i}', {'data': None}, {})
+    assert len(cache) == 2
+    assert cache.get(ResponseCache.key('http://example.com/api/rooms/0', None, 'id')) is None
+
+# Identity map tests
+def test_client_identity_map(mock_api):
+    from flair_api import IdentityMap
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         identity_map=IdentityMap(max_age=60))
+    listed = client.get('structures')[0]
+    single = client.get('structures', id=1)
+    assert single is listed
+    calls = mock_api.call_count
+    assert client.get('structures', id='1') is listed
+    assert mock_api.call_count == calls
+    listed.update(attributes={'name': 'Better Name'})
+    assert single.attributes['name'] == 'Better Name'
+    single.get_self()
+    assert mock_api.call_count == calls + 2
+    single.delete()
+    assert client.identity_map.get('structures', 1) is None
+
+def test_identity_map_lru_and_weakrefs(api_client):
+    import gc
+    from flair_api import IdentityMap, Resource
+    identity_map = IdentityMap(max_size=1)
+    kept = identity_map.add(Resource(api_client, '1', 'rooms', {}, {}))
+    identity_map.add(Resource(api_client, '2', 'rooms', {}, {}))
+    identity_map.add(Resource(api_client, '3', 'rooms', {}, {}))
+    gc.collect()
+    assert identity_map.get('rooms', '1') is kept
+    assert identity_map.get('rooms', '2') is None
+    assert identity_map.get('rooms', '3') is not None
+
+# Persisted state tests
+def test_make_client_restores_state(mock_api, tmp_path, api_root, api_token):
+    from flair_api import FileStateStore
+    store = FileStateStore(tmp_path / 'state.json')
+    make_client('client_id', 'client_secret', 'http://example.com', state_store=store)
+    assert oct((tmp_path / 'state.json').stat().st_mode & 0o777) == '0o600'
+    calls = mock_api.call_count
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         state_store=store, revalidate_state=False)
+    assert mock_api.call_count == calls
+    assert client.token == api_token
+    assert client.api_root_resp == api_root['links']
+    assert client.get('structures', id=1).id_ == '1'
+
+def test_async_client_close_cancels_root_revalidation(tmp_path, api_root, api_token):
+    import asyncio
+    httpx = pytest.importorskip('httpx')
+    from flair_api import make_async_client, FileStateStore
+    paths = []
+
+    def handler(request):
+        paths.append(request.url.path)
+        if request.url.path == '/oauth2/token':
+            return httpx.Response(200, json={'access_token': api_token, 'expires_in': 3600})
+        return httpx.Response(200, json=api_root)
+
+    async def scenario():
+        session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        store = FileStateStore(tmp_path / 'state.json')
+        first = await make_async_client('client_id', 'client_secret', 'http://example.com',
+                                        session=session, state_store=store)
+        await first.resource_url('structures')
+        await first.close()
+        await asyncio.sleep(0.1)
+        del paths[:]
+        client = await make_async_client('client_id', 'client_secret', 'http://example.com',
+                                         session=session, state_store=store)
+        task = client._revalidation
+        assert task is not None
+        await client.close()
+        await asyncio.sleep(0.05)
+        await session.aclose()
+        return task, client
+
+    task, client = asyncio.run(scenario())
+    assert task.cancelled() and client._revalidation is None
+    assert paths == []
+
+def test_make_client_refreshes_expired_state(mock_api, tmp_path):
+    from flair_api import FileStateStore
+    store = FileStateStore(tmp_path / 'state.json')
+    client = make_client('client_id', 'client_secret', 'http://example.com', state_store=store)
+    client.refresh_token = 'refresh'
+    client.expires_at = 0
+    client.save_state()
+    restored = make_client('client_id', 'client_secret', 'http://example.com',
+                           state_store=store, revalidate_state=False)
+    assert mock_api.last_request.url == 'http://example.com/oauth2/token'
+    assert 'grant_type=refresh_token' in mock_api.last_request.text
+    assert restored.expires_at > 0
+
+def test_client_adopts_token_renewed_by_other_client(mock_api, tmp_path):
+    from flair_api import FileStateStore
+    store = FileStateStore(tmp_path / 'state.json')
+    first = make_client('client_id', 'client_secret', 'http://example.com', state_store=store)
+    second = make_client('client_id', 'client_secret', 'http://example.com',
+                         state_store=store, revalidate_state=False)
+    first.expires_at = second.expires_at = 0
+    mock_api.post('http://example.com/oauth2/token', json={
+        'access_token': 'renewed', 'refresh_token': 'rotated', 'expires_in': 3600})
+    first.refresh_token = 'refresh'
+    first._ensure_valid_token()
+    token_calls = [r.path for r in mock_api.request_history].count("/oauth2/token")
+    second._ensure_valid_token()
+    assert second.token == 'renewed' and second.refresh_token == 'rotated'
+    assert [r.path for r in mock_api.request_history].count("/oauth2/token") == token_calls
+
+def test_file_state_store_lock_is_exclusive_across_processes(tmp_path):
+    import subprocess
+    import sys
+    from flair_api import FileStateStore
+    store = FileStateStore(tmp_path / 'state.json')
+    probe = ("import fcntl, sys\n"
+             "f = open(sys.argv[1], 'a+')\n"
+             "try:\n"
+             "    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+             "except BlockingIOError:\n"
+             "    sys.exit(1)\n")
+    pytest.importorskip('fcntl')
+    with store.lock():
+        assert subprocess.run([sys.executable, '-c', probe, store.lock_path]).returncode == 1
+    assert subprocess.run([sys.executable, '-c', probe, store.lock_path]).returncode == 0
+
+def test_async_clients_renew_shared_token_once_under_store_lock(tmp_path, api_root):
+    import asyncio
+    httpx = pytest.importorskip('httpx')
+    fcntl = pytest.importorskip('fcntl')
+    from flair_api import AsyncClient, FileStateStore
+    lock_held = []
+
+    def handler(request):
+        if request.url.path == '/oauth2/token':
+            with open(str(tmp_path / 'state.json') + '.lock', 'a+') as probe:
+                try:
+                    fcntl.flock(probe.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    lock_held.append(False)
+                except BlockingIOError:
+                    lock_held.append(True)
+            return httpx.Response(200, json={'access_token': 'renewed',
+                                             'refresh_token': 'rotated', 'expires_in': 3600})
+        return httpx.Response(200, json=api_root)
+
+    async def scenario():
+        session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients = [AsyncClient('client_id', 'client_secret', 'http://example.com',
+                               session=session,
+                               state_store=FileStateStore(tmp_path / 'state.json'))
+                   for _ in range(2)]
+        for client in clients:
+            client.access_token, client.refresh_token, client.expires_at = 'old', 'refresh', 0
+        await asyncio.gather(*(client._ensure_valid_token() for client in clients))
+        for client in clients:
+            await client.close()
+        await session.aclose()
+        return clients
+
+    first, second = asyncio.run(scenario())
+    assert lock_held == [True]
+    assert first.token == second.token == 'renewed'
+    assert FileStateStore(tmp_path / 'state.json').load(first._state_key())['refresh_token'] == 'rotated'
+
+# Thread-safety tests
+def test_client_single_flight_refresh_and_root_under_threads(mock_api, api_root, api_token):
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from flair_api.client import Client
+
+    def slow_json(payload):
+        def callback(request, context):
+            time.sleep(0.05)
+            return payload
+        return callback
+
+    mock_api.post('http://example.com/oauth2/token',
+                  json=slow_json({'access_token': api_token, 'refresh_token': 'rotated',
+                                  'expires_in': 3600}))
+    mock_api.get('http://example.com/api/', json=slow_json(api_root))
+    client = Client('client_id', 'client_secret', 'http://example.com')
+    client.access_token = 'expired'
+    client.refresh_token = 'refresh'
+    client.expires_at = 0
+    start = threading.Barrier(32)
+
+    def worker(_):
+        start.wait()
+        return client.get('structures', id=1).id_
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        assert set(executor.map(worker, range(32))) == {'1'}
+    paths = [r.path for r in mock_api.request_history]
+    assert paths.count('/oauth2/token') == 1
+    assert paths.count('/api/') == 1
+    assert client.refresh_token == 'rotated'
+
+# Proactive token refresh tests
+def test_client_refreshes_token_ahead_of_expiry(mock_api, api_token):
+    import threading
+    refreshed = threading.Event()
+    seen = []
+
+    def on_refresh(client):
+        seen.append(client.refresh_token)
+        if client.refresh_token == 'rotated':
+            refreshed.set()
+
+    mock_api.post('http://example.com/oauth2/token', [
+        {'json': {'access_token': api_token, 'refresh_token': 'refresh', 'expires_in': 3600}},
+        {'json': {'access_token': 'renewed', 'refresh_token': 'rotated', 'expires_in': 3600}},
+    ])
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         refresh_ahead=0.5, on_token_refresh=on_refresh)
+    try:
+        client.token_obtained_at -= 1800
+        assert refreshed.wait(5)
+        assert client.token == 'renewed'
+        assert seen == ['refresh', 'rotated']
+        assert 'grant_type=refresh_token' in mock_api.last_request.text
+    finally:
+        client.close()
+    assert client._refresher_stop is None
+
+def test_client_keeps_valid_token_when_refresh_ahead_fails(mock_api, api_token):
+    import time
+    mock_api.post('http://example.com/oauth2/token', [
+        {'json': {'access_token': api_token, 'refresh_token': 'refresh', 'expires_in': 3600}},
+        {'status_code': 503, 'text': 'unavailable'},
+    ])
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         refresh_ahead=0.5)
+    try:
+        client.token_obtained_at -= 1800
+        deadline = time.monotonic() + 5
+        while mock_api.call_count < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        token_requests = [r for r in mock_api.request_history if r.path == '/oauth2/token']
+        assert len(token_requests) == 2
+        assert 'grant_type=refresh_token' in token_requests[-1].text
+        assert client.token == api_token and client.refresh_token == 'refresh'
+        assert client.get('structures', id=1).id_ == '1'
+    finally:
+        client.close()
+
+def test_async_client_refreshes_token_ahead_of_expiry(api_root):
+    import asyncio
+    httpx = pytest.importorskip('httpx')
+    from flair_api import make_async_client
+    tokens = iter(['first', 'renewed'])
+    grants = []
+
+    def handler(request):
+        if request.url.path == '/oauth2/token':
+            grants.append(request.content.decode())
+            return httpx.Response(200, json={'access_token': next(tokens),
+                                             'refresh_token': 'refresh', 'expires_in': 3600})
+        return httpx.Response(200, json=api_root)
+
+    async def scenario():
+        session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client = await make_async_client('client_id', 'client_secret', 'http://example.com',
+                                         session=session, refresh_ahead=0.5)
+        client.token_obtained_at -= 1800
+        while client.token != 'renewed':
+            await asyncio.sleep(0.01)
+        await client.close()
+        await session.aclose()
+        return client
+
+    client = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert client._refresher_task is None
+    assert 'grant_type=refresh_token' in grants[-1]
+
+# Rate limiting tests
+def test_rate_limiter_token_bucket():
+    import time
+    from flair_api import RateLimiter
+    limiter = RateLimiter(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.07
+
+def test_client_retries_throttled_request(mock_api, structure_body):
+    from flair_api import RateLimiter
+    limiter = RateLimiter(rate=100, max_rate=200)
+    client = make_client('client_id', 'client_secret', 'http://example.com', rate_limiter=limiter)
+    mock_api.get('http://example.com/api/structures/1', [
+        {'status_code': 429, 'headers': {'Retry-After': '0'}},
+        {'json': dict(meta={}, data=structure_body)},
+    ])
+    assert client.get('structures', id=1).id_ == '1'
+    assert limiter.throttled == 1
+    assert limiter.rate < 100
+
+def test_client_raises_rate_limit_error(mock_api):
+    from flair_api import RateLimitError
+    client = make_client('client_id', 'client_secret', 'http://example.com', rate_limiter=100)
+    mock_api.get('http://example.com/api/structures/1', status_code=429,
+                 headers={'Retry-After': '0'})
+    with pytest.raises(RateLimitError) as excinfo:
+        client.get('structures', id=1)
+    assert excinfo.value.retry_after == 0
+    assert client.rate_limiter.throttled == client.rate_limiter.max_retries + 1
+
+def test_rate_limiter_shared_between_clients(mock_api):
+    first = make_client('client_id', 'client_secret', 'http://example.com',
+                        rate_limiter=5, share_rate_limiter=True)
+    second = make_client('client_id', 'client_secret', 'http://example.com',
+                         rate_limiter=5, share_rate_limiter=True)
+    other = make_client('other_id', 'client_secret', 'http://example.com',
+                        rate_limiter=5, share_rate_limiter=True)
+    assert first.rate_limiter is second.rate_limiter
+    assert other.rate_limiter is not first.rate_limiter
+
+def test_rate_limiter_pauses_when_quota_exhausted():
+    from flair_api import RateLimiter
+    limiter = RateLimiter(rate=100)
+    limiter.on_response(200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '0.05'})
+    assert limiter.acquire() >= 0.04
+
+# Retry tests
+@pytest.fixture
+def fast_retry():
+    from flair_api import RetryPolicy
+    return RetryPolicy(max_retries=2, base_delay=0, max_delay=0)
+
+def test_client_retries_idempotent_requests(mock_api, structure_body, fast_retry):
+    client = make_client('client_id', 'client_secret', 'http://example.com', retry=fast_retry)
+    mock_api.get('http://example.com/api/structures/1', [
+        {'status_code': 503},
+        {'status_code': 502},
+        {'json': dict(meta={}, data=structure_body)},
+    ])
+    assert client.get('structures', id=1).id_ == '1'
+    assert fast_retry.retries == 2
+
+def test_client_does_not_retry_post(mock_api, fast_retry):
+    client = make_client('client_id', 'client_secret', 'http://example.com', retry=fast_retry)
+    mock_api.post('http://example.com/api/structures', status_code=503)
+    with pytest.raises(ApiError) as excinfo:
+        client.create('structures', attributes={'name': 'Home Sweet Home'})
+    assert excinfo.value.retries == 0
+    assert fast_retry.retries == 0
+
+def test_client_retry_gives_up_with_retry_count(mock_api, fast_retry):
+    import requests
+    client = make_client('client_id', 'client_secret', 'http://example.com', retry=fast_retry)
+    mock_api.get('http://example.com/api/structures/1', exc=requests.exceptions.ConnectionError)
+    with pytest.raises(ApiError) as excinfo:
+        client.get('structures', id=1)
+    assert excinfo.value.retries == 2
+    assert excinfo.value.status_code is None
+    assert fast_retry.exhausted == 1
+
+def refused_connection():
+    import requests
+    from urllib3.exceptions import MaxRetryError, NewConnectionError
+    reason = NewConnectionError(None, 'Failed to establish a new connection: [Errno 111] Connection refused')
+    return requests.exceptions.ConnectionError(MaxRetryError(None, '/api/structures', reason))
+
+@pytest.mark.parametrize('never_connected', ['connect_timeout', 'refused'])
+def test_client_retries_post_that_never_connected(mock_api, structure_body, fast_retry,
+                                                  never_connected):
+    import requests
+    exc = requests.exceptions.ConnectTimeout() if never_connected == 'connect_timeout' \
+        else refused_connection()
+    client = make_client('client_id', 'client_secret', 'http://example.com', retry=fast_retry)
+    mock_api.post('http://example.com/api/structures', [
+        {'exc': exc},
+        {'json': dict(meta={}, data=structure_body)},
+    ])
+    assert client.create('structures', attributes={'name': 'Home Sweet Home'}).id_ == '1'
+
+def test_client_does_not_retry_post_after_connection_reset(mock_api, fast_retry):
+    import requests
+    client = make_client('client_id', 'client_secret', 'http://example.com', retry=fast_retry)
+    mock_api.post('http://example.com/api/structures',
+                  exc=requests.exceptions.ConnectionError('Connection reset by peer'))
+    with pytest.raises(ApiError) as excinfo:
+        client.create('structures', attributes={'name': 'Home Sweet Home'})
+    assert excinfo.value.retries == 0
+
+def test_client_request_timeout_is_capped_by_retry_deadline(mock_api, structure_body):
+    import requests
+    from flair_api import RetryPolicy
+    client = make_client('client_id', 'client_secret', 'http://example.com', timeout=5,
+                         retry=RetryPolicy(base_delay=0.01, max_delay=0.01, deadline=2))
+    mock_api.get('http://example.com/api/structures/1', [
+        {'exc': requests.exceptions.ReadTimeout},
+        {'json': dict(meta={}, data=structure_body)},
+    ])
+    assert client.get('structures', id=1).id_ == '1'
+    attempts = mock_api.request_history[-2:]
+    assert all(0 < r.timeout <= 2 for r in attempts)
+    assert attempts[1].timeout < attempts[0].timeout
+    unlimited = make_client('client_id', 'client_secret', 'http://example.com', retry=None)
+    unlimited.get('structures', id=1)
+    assert mock_api.last_request.timeout == 30.0
+
+def test_retry_policy_respects_deadline():
+    import time
+    from flair_api import RetryPolicy
+    policy = RetryPolicy(base_delay=1, max_delay=1, deadline=0.5)
+    assert policy.next_delay('GET', 0, time.monotonic(), 0, status=503) is None
+
+# Compound document tests
+def test_client_resolves_included_relationships(mock_api, api_client, structure_body):
+    room = {'id': '1', 'type': 'rooms', 'attributes': {'name': 'Kitchen'},
+            'relationships': {'structure': {'data': {'id': '1', 'type': 'structures'},
+                                            'links': {'related': '/api/rooms/1/structure'}}}}
+    mock_api.get('http://example.com/api/structures/1?include=rooms',
+                 json=dict(meta={}, data=structure_body, included=[room]))
+    structure = api_client.get('structures', id=1, include=['rooms'])
+    assert mock_api.last_request.qs == {'include': ['rooms']}
+    calls = mock_api.call_count
+    rooms = structure.get_rel('rooms')
+    assert [r.attributes['name'] for r in rooms] == ['Kitchen']
+    assert rooms[0].get_rel('structure') == structure
+    assert mock_api.call_count == calls
+
+def test_relationship_without_included_record_is_fetched(mock_api, api_client):
+    mock_api.get('http://example.com/api/structures/1/rooms', json=dict(meta={}, data=[]))
+    structure = api_client.get('structures', id=1)
+    assert len(structure.get_rel('rooms')) == 0
+    assert mock_api.last_request.path == '/api/structures/1/rooms'
+
+# Sparse fieldset tests
+def test_client_requests_sparse_fieldsets(mock_api, api_client, structure_body):
+    sparse = dict(structure_body, relationships={})
+    mock_api.get('http://example.com/api/structures/1?fields[structures]=name',
+                 json=dict(meta={}, data=sparse))
+    structure = api_client.get('structures', id=1, fields={'structures': ['name']})
+    assert mock_api.last_request.qs == {'fields[structures]': ['name']}
+    assert structure.is_partial
+    assert structure.loaded_fields == {'name'}
+    assert not api_client.get('structures', id=1).is_partial
+
+def test_full_reload_of_sparse_resource_is_not_partial(mock_api, api_client, structure_body):
+    sparse = dict(structure_body, relationships={})
+    mock_api.get('http://example.com/api/structures/1?fields[structures]=name',
+                 json=dict(meta={}, data=sparse))
+    structure = api_client.get('structures', id=1, fields={'structures': ['name']})
+    assert not structure.get_self().is_partial
+    structure = api_client.get('structures', id=1, fields={'structures': ['name']})
+    structure.update(attributes={'name': 'Better Name'})
+    assert not structure.is_partial
+    assert structure.attributes['name'] == 'Better Name'
+
+def test_collection_pages_keep_sparse_fieldsets(paged_api, api_client):
+    structures = api_client.get('structures', fields={'structures': 'name'}, include='rooms')
+    assert [s.id_ for s in structures] == ['1', '2', '3']
+    assert paged_api.last_request.qs == {'page': ['3'], 'fields[structures]': ['name'],
+                                         'include': ['rooms']}
+    assert all(s.loaded_fields == {'name'} for s in structures)
+
+def test_identity_map_merges_sparse_loads(mock_api, structure_body):
+    from flair_api import IdentityMap
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         identity_map=IdentityMap(max_age=60))
+    full = client.get('structures', id=1)
+    mock_api.get('http://example.com/api/structures?fields[structures]=name',
+                 json=dict(meta={}, data=[dict(structure_body, attributes={'name': 'New'},
+                                               relationships={})]))
+    listed = client.get('structures', fields={'structures': ['name']})[0]
+    assert listed is full
+    assert not full.is_partial
+    assert full.attributes['name'] == 'New'
+    assert 'rooms' in full.relationships
+
+# JSON codec tests
+@pytest.mark.parametrize('codec', ['json', 'orjson', 'ujson'])
+def test_client_json_codec(mock_api, structure_body, codec):
+    from flair_api import available_codecs
+    if codec not in available_codecs():
+        pytest.skip(f"{codec} is not installed")
+    client = make_client('client_id', 'client_secret', 'http://example.com', codec=codec)
+    assert client.codec.name == codec
+    structure = client.get('structures', id=1)
+    assert structure.attributes['name'] == 'Home Sweet Home'
+    structure.update(attributes={'name': 'Café'})
+    assert mock_api.last_request.json()['data']['attributes'] == {'name': 'Café'}
+    mock_api.get('http://example.com/api/structures/2', status_code=422,
+                 json={'errors': [{'detail': 'bad'}]})
+    with pytest.raises(ApiError) as e:
+        client.get('structures', id=2)
+    assert e.value.error_details == [{'detail': 'bad'}]
+
+def test_unknown_json_codec():
+    from flair_api.codec import get_codec
+    with pytest.raises(ValueError):
+        get_codec('simdjson')
+
+# Compact model tests
+def test_resource_relationships_are_built_lazily(api_client, structure_body):
+    structure = api_client.create_model(**structure_body)
+    assert not hasattr(structure, '__dict__')
+    assert structure.relationships._built is None
+    assert list(structure.relationships) == ['rooms']
+    rooms = structure.relationships['rooms']
+    assert rooms is structure.relationships['rooms']
+    assert rooms.related_href == '/api/structures/1/rooms'
+    assert rooms.data == [{'id': '1', 'type': 'rooms'}]
+
+def test_mapper_subclass_of_compact_resource(mock_api):
+    from flair_api import Resource
+
+    class Structure(Resource):
+        def __init__(self, client, id_, type_, attributes, relationships):
+            super().__init__(client, id_, type_, attributes, relationships)
+            self.label = attributes.get('name', '').upper()
+
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         mapper={'structures': Structure})
+    structure = client.get('structures', id=1)
+    assert isinstance(structure, Structure)
+    assert structure.label == 'HOME SWEET HOME'
+    assert 'rooms' in structure.relationships
+
+# Lazy model tests
+def test_lazy_collection_builds_models_on_access(paged_api):
+    client = make_client('client_id', 'client_secret', 'http://example.com', lazy_models=True)
+    structures = client.get('structures')
+    assert structures.resources.materialized == 0
+    assert structures[0].attributes['name'] == 'Home Sweet Home'
+    assert structures.resources.materialized == 1
+    assert structures[0] is structures[0]
+    assert [s.id_ for s in structures] == ['1', '2', '3']
+    assert structures.resources.materialized == 3
+
+@pytest.mark.parametrize('lazy_models', [False, True])
+def test_collection_iter_raw(paged_api, lazy_models):
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         lazy_models=lazy_models)
+    structures = client.get('structures')
+    records = list(structures.iter_raw())
+    assert [(r['id'], r['attributes']['name']) for r in records] == \
+        [('1', 'Home Sweet Home'), ('2', 'Home Sweet Home'), ('3', 'Home Sweet Home')]
+    assert len(structures) == 1
+
+# Columnar export tests
+def test_collection_to_columns(paged_api, api_client):
+    paged_api.get('http://example.com/api/structures?page=3', json=dict(meta={}, data=[
+        {'id': '3', 'type': 'structures', 'attributes': {'temperature': 21.5}}]))
+    columns = api_client.get('structures').to_columns()
+    assert columns == {'id': ['1', '2', '3'],
+                       'name': ['Home Sweet Home', 'Home Sweet Home', None],
+                       'temperature': [None, None, 21.5]}
+    assert api_client.get('structures').to_columns(fields=['name'])['name'][0] == 'Home Sweet Home'
+
+def test_column_kinds():
+    from flair_api.columns import column_kind
+    assert column_kind([1, 2]) == 'int'
+    assert column_kind([1, None]) == 'float'
+    assert column_kind([1, 2.5]) == 'float'
+    assert column_kind([True, False]) == 'bool'
+    assert column_kind(['2024-01-01T00:00:00Z', None]) == 'datetime'
+    assert column_kind(['Kitchen', 1]) == 'object'
+
+def test_collection_to_numpy(mock_api):
+    numpy = pytest.importorskip('numpy')
+    mock_api.get('http://example.com/api/vents', json=dict(meta={}, data=[
+        {'id': '1', 'type': 'vents', 'attributes': {
+            'percent-open': 50, 'duct-temperature-c': 20.5,
+            'created-at': '2024-01-01T01:00:00+01:00'}},
+        {'id': '2', 'type': 'vents', 'attributes': {
+            'percent-open': 100, 'duct-temperature-c': None,
+            'created-at': '2024-01-01T00:00:00.000Z'}}]))
+    mock_api.get('http://example.com/api/', json={'links': {'vents': {'self': '/api/vents'}}})
+    client = make_client('client_id', 'client_secret', 'http://example.com')
+    arrays = client.get('vents').to_numpy()
+    assert arrays['percent-open'].dtype == numpy.int64
+    assert numpy.isnan(arrays['duct-temperature-c'][1])
+    assert (arrays['created-at'] == numpy.datetime64('2024-01-01T00:00:00')).all()
+
+# Time range tests
+@pytest.fixture
+def readings_api(mock_api):
+    from urllib.parse import urlsplit, parse_qs
+    readings = [{'id': str(i), 'type': 'sensor-readings',
+                 'attributes': {'created-at': f'2024-01-0{1 + i // 4}T{(i % 4) * 6:02d}:00:00Z',
+                                'room-temperature-c': 20 + i}}
+                for i in range(12)]
+
+    def respond(request, context):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(request.url).query).items()}
+        # Bounds are inclusive here, so records on window edges come back twice.
+        matching = [r for r in reversed(readings)
+                    if query['filter[created-at][gte]'] <= r['attributes']['created-at']
+                    <= query['filter[created-at][lt]']]
+        page = int(query.get('page', 1))
+        meta = {'next': f'/api/pucks/1/sensor-readings?page={page + 1}'} \
+            if page * 2 < len(matching) else {}
+        return dict(meta=meta, data=matching[(page - 1) * 2:page * 2])
+
+    mock_api.get('http://example.com/api/pucks/1/sensor-readings', json=respond)
+    return readings
+
+def test_client_get_time_range(readings_api, api_client):
+    from datetime import datetime, timedelta
+    readings = api_client.get_time_range('/api/pucks/1/sensor-readings',
+                                         datetime(2024, 1, 1), datetime(2024, 1, 4),
+                                         window=timedelta(hours=12), max_workers=3)
+    assert [r.id_ for r in readings] == [str(i) for i in range(12)]
+
+# Watch tests
+def test_watcher_reports_changed_attributes(mock_api, api_client, structure_body):
+    from flair_api import Watcher
+    seen = []
+    watcher = Watcher(api_client, min_interval=1, max_interval=8, jitter=0, on_change=seen.append)
+    target = watcher.watch('structures')
+    assert watcher.poll(now=watcher.next_due()) == []
+    assert target.interval == 2
+    assert watcher.poll(now=watcher.next_due()) == []
+    assert target.interval == 4
+    mock_api.get('http://example.com/api/structures', json=dict(meta={}, data=[
+        dict(structure_body, attributes={'name': 'Cabin'}),
+        dict(structure_body, id='2')]))
+    changes = watcher.poll(now=watcher.next_due())
+    assert [(c.kind, c.id_, c.changes) for c in changes] == [
+        ('changed', '1', {'name': ('Home Sweet Home', 'Cabin')}),
+        ('created', '2', {'name': (None, 'Home Sweet Home')})]
+    assert seen == changes
+    assert target.interval == 1
+
+def test_watcher_single_resource_deleted(mock_api, api_client):
+    from flair_api import Watcher
+    watcher = Watcher(api_client, jitter=0)
+    target = watcher.watch('structures', id=1)
+    watcher.poll(now=watcher.next_due())
+    mock_api.get('http://example.com/api/structures/1', status_code=404)
+    changes = watcher.poll(now=watcher.next_due())
+    assert [(c.kind, c.id_) for c in changes] == [('deleted', '1')]
+    assert not target.active
+    assert watcher.next_due() is None
+
+# Request coalescing tests
+def test_client_coalesces_concurrent_identical_gets(mock_api, api_client, structure_body):
+    import time
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    barrier = threading.Barrier(8)
+
+    def slow(request, context):
+        time.sleep(0.2)
+        return dict(meta={}, data=structure_body)
+
+    mock_api.get('http://example.com/api/structures/1', json=slow)
+    calls = mock_api.call_count
+
+    def get(_):
+        barrier.wait()
+        return api_client.get('structures', id=1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        structures = list(executor.map(get, range(8)))
+    assert mock_api.call_count == calls + 1
+    assert api_client.coalescer.leaders == 1
+    assert api_client.coalescer.coalesced == 7
+    assert len({id(s) for s in structures}) == 8
+    assert len({id(s.attributes) for s in structures}) == 8
+    assert all(s.attributes['name'] == 'Home Sweet Home' for s in structures)
+
+def test_coalesced_followers_do_not_see_leader_changes(monkeypatch):
+    import time
+    import threading
+    from flair_api import coalesce
+    coalescer = coalesce.RequestCoalescer()
+    copy_document = coalesce.copy_document
+
+    def slow_follower_copy(document):
+        # The follower runs in the main thread; give the leader time to change its document.
+        if threading.current_thread() is threading.main_thread():
+            time.sleep(0.1)
+        return copy_document(document)
+
+    monkeypatch.setattr(coalesce, 'copy_document', slow_follower_copy)
+
+    def fetch():
+        while not coalescer.coalesced:
+            time.sleep(0.001)
+        return {'data': {'attributes': {'name': 'Home'}}}
+
+    def lead():
+        document = coalescer.run('key', fetch)
+        document['data']['attributes']['name'] = 'Changed'
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    while 'key' not in coalescer._calls:
+        time.sleep(0.001)
+    followed = coalescer.run('key', fetch)
+    leader.join()
+    assert followed['data']['attributes']['name'] == 'Home'
+
+def test_coalesced_follower_survives_cancelled_leader():
+    import asyncio
+    from flair_api import RequestCoalescer
+    coalescer = RequestCoalescer()
+
+    async def hang():
+        await asyncio.Event().wait()
+
+    async def fetch():
+        return {'data': {'attributes': {'name': 'Home'}}}
+
+    async def scenario():
+        leader = asyncio.ensure_future(coalescer.run_async('key', hang))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(coalescer.run_async('key', fetch))
+        await asyncio.sleep(0)
+        assert coalescer.coalesced == 1
+        leader.cancel()
+        document = await asyncio.wait_for(follower, 5)
+        assert leader.cancelled()
+        return document
+
+    assert asyncio.run(scenario()) == {'data': {'attributes': {'name': 'Home'}}}
+    assert coalescer.leaders == 2 and coalescer.coalesced == 0 and len(coalescer) == 0
+
+def test_coalesced_follower_retries_after_interrupted_leader():
+    import time
+    import threading
+    from flair_api import RequestCoalescer
+    coalescer = RequestCoalescer()
+
+    class Interrupted(BaseException):
+        pass
+
+    def interrupted():
+        while not coalescer.coalesced:
+            time.sleep(0.001)
+        raise Interrupted()
+
+    def lead():
+        with pytest.raises(Interrupted):
+            coalescer.run('key', interrupted)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    while 'key' not in coalescer._calls:
+        time.sleep(0.001)
+    assert coalescer.run('key', lambda: {'data': None}) == {'data': None}
+    leader.join()
+    assert coalescer.leaders == 2 and coalescer.coalesced == 0
+
+# Client pool tests
+def test_client_pool_shares_session_and_root(mock_api):
+    from flair_api import ClientPool
+    pool = ClientPool('http://example.com', max_clients=2, max_concurrency=2)
+    for account in ('a', 'b', 'c'):
+        pool.register(account, f'id-{account}', 'secret')
+    assert pool.active == []
+    a, b = pool['a'], pool['b']
+    assert a.session is b.session is pool.session
+    assert a.api_root_resp is b.api_root_resp
+    assert [r.method for r in mock_api.request_history].count('GET') == 1
+    assert a.get('structures')[0].id_ == '1'
+    assert mock_api.last_request.headers['Authorization'] == 'Bearer token'
+    assert pool['a'] is a
+    pool['c']
+    assert pool.active == ['a', 'c']
+    assert pool.evicted == 1
+    assert pool['b'] is not b
+    assert pool.created == 4
+    pool.close()
+
+def test_client_pool_evicts_idle_clients(mock_api):
+    import time
+    from flair_api import ClientPool
+    pool = ClientPool('http://example.com', idle_timeout=60)
+    pool.register('a', 'id-a', 'secret')
+    pool['a']
+    assert pool.evict_idle(now=time.monotonic() + 30) == 0
+    assert pool.evict_idle(now=time.monotonic() + 61) == 1
+    assert pool.active == []
+    with pytest.raises(KeyError):
+        pool['unknown']
+
+def test_client_max_concurrency(mock_api):
+    import time
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    client = make_client('client_id', 'client_secret', 'http://example.com',
+                         max_concurrency=2, coalesce=False)
+    send = client._send
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow_send(*args, **kwargs):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.05)
+        with lock:
+            in_flight.pop()
+        return send(*args, **kwargs)
+
+    client._send = slow_send
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda _: client.get('structures', id=1), range(6)))
+    assert max(peak) == 2
+
+# Instrumentation tests
+def test_client_request_hooks_and_metrics(mock_api):
+    from flair_api import MetricsRegistry, prometheus_text
+    metrics = MetricsRegistry()
+    before, after = [], []
+    client = make_client('client_id', 'client_secret', 'http://example.com', metrics=metrics,
+                         before_request=before.append, after_request=[after.append])
+    client.get('structures', id=1)
+    mock_api.get('http://example.com/api/structures/2', status_code=404)
+    with pytest.raises(ApiError):
+        client.get('structures', id=2)
+    assert [(i.method, i.resource_type, i.status) for i in after] == [
+        ('GET', 'structures', 200), ('GET', 'structures', 404)]
+    assert before == after
+    assert after[0].bytes_in > 0 and after[0].latency > 0
+    assert isinstance(after[1].error, ApiError)
+    assert metrics.token_refreshes == 1
+    text = prometheus_text(metrics)
+    assert 'flair_client_requests_total{method="GET",resource_type="structures",status="200"} 1' in text
+    assert 'flair_client_request_duration_seconds_bucket{method="GET",resource_type="structures",le="+Inf"} 2' in text
+    assert 'flair_client_token_refreshes_total 1' in text
+
+def test_resource_type_from_url():
+    from flair_api.metrics import resource_type_from_url
+    assert resource_type_from_url('http://example.com/api/structures') == 'structures'
+    assert resource_type_from_url('http://example.com/api/structures/1') == 'structures'
+    assert resource_type_from_url('/api/structures/1/rooms') == 'rooms'
+    assert resource_type_from_url('/api/structures/1/relationships/rooms') == 'rooms'